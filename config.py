@@ -2,7 +2,10 @@
 Configuration settings for the AI Architectural Search System
 """
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
 from dataclasses import dataclass
 from typing import Tuple, Optional
 
@@ -25,6 +28,11 @@ class AppConfig:
     # Performance settings
     batch_size: int = 32
     max_image_size: Tuple[int, int] = (512, 512)
+    embedding_dtype: str = "float16"
+    metadata_format: str = "json"
+    pretty_json: bool = False
+    compress_embeddings: bool = True
+    strict_sanitize: bool = False
     
     # Web interface settings
     page_title: str = "AI Architectural Search"
@@ -72,6 +80,11 @@ class AppConfig:
             # Performance settings
             batch_size=int(os.getenv('BATCH_SIZE', '32')),
             max_image_size=max_image_size,
+            embedding_dtype=os.getenv('EMBEDDING_DTYPE', 'float16'),
+            metadata_format=os.getenv('METADATA_FORMAT', 'json'),
+            pretty_json=parse_bool(os.getenv('PRETTY_JSON'), False),
+            compress_embeddings=parse_bool(os.getenv('COMPRESS_EMBEDDINGS'), True),
+            strict_sanitize=parse_bool(os.getenv('STRICT_SANITIZE'), False),
             
             # Web interface
             page_title=os.getenv('PAGE_TITLE', 'AI Architectural Search'),
@@ -96,6 +109,10 @@ class AppConfig:
             raise ValueError("similarity_threshold must be between 0 and 1")
         if self.batch_size <= 0:
             raise ValueError("batch_size must be positive")
+        if self.embedding_dtype not in ['float16', 'float32', 'int8']:
+            raise ValueError("embedding_dtype must be float16, float32, or int8")
+        if self.metadata_format not in ['pickle', 'json']:
+            raise ValueError("metadata_format must be pickle or json")
         if self.environment not in ['development', 'staging', 'production']:
             raise ValueError("environment must be development, staging, or production")
         if self.log_level not in ['DEBUG', 'INFO', 'WARNING', 'ERROR']:
@@ -106,26 +123,40 @@ class AppConfig:
             os.makedirs(self.image_directory, exist_ok=True)
     
     def configure_logging(self) -> None:
-        """Configure logging based on environment settings"""
+        """
+        Configure logging based on environment settings.
+        
+        Records are handed to a QueueListener thread, so file and console
+        writes happen off the request path. Like logging.basicConfig, this is
+        a no-op when the root logger already has handlers.
+        """
+        root_logger = logging.getLogger()
+        if root_logger.handlers:
+            return
+        
         log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         
         if self.environment == 'production':
             # Production logging - structured format
-            logging.basicConfig(
-                level=getattr(logging, self.log_level),
-                format=log_format,
-                handlers=[
-                    logging.StreamHandler(),
-                    logging.FileHandler('app.log') if os.access('.', os.W_OK) else logging.StreamHandler()
-                ]
-            )
+            handlers = [
+                logging.StreamHandler(),
+                logging.FileHandler('app.log') if os.access('.', os.W_OK) else logging.StreamHandler()
+            ]
         else:
             # Development/staging logging - console only
-            logging.basicConfig(
-                level=getattr(logging, self.log_level),
-                format=log_format,
-                handlers=[logging.StreamHandler()]
-            )
+            handlers = [logging.StreamHandler()]
+        
+        formatter = logging.Formatter(log_format)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        log_queue = queue.Queue(-1)
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        root_logger.setLevel(getattr(logging, self.log_level))
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     def get_optimization_settings(self) -> dict:
         """Get optimization settings for cloud deployment"""
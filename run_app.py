@@ -6,6 +6,9 @@ import sys
 import os
 from pathlib import Path
 
+# Streamlit entry script, resolved once relative to this file
+APP_FILE = Path(__file__).parent / "app.py"
+
 # Set up environment
 os.environ.setdefault('ENVIRONMENT', 'production')
 os.environ.setdefault('MEMORY_OPTIMIZATION', 'true')
@@ -25,7 +28,7 @@ if 'PORT' in os.environ:
 # Run streamlit with proper module path
 if __name__ == "__main__":
     from streamlit.web import cli as stcli
-    sys.argv = ["streamlit", "run", "app.py", "--server.address=0.0.0.0"]
+    sys.argv = ["streamlit", "run", str(APP_FILE), "--server.address=0.0.0.0"]
     if 'PORT' in os.environ:
         sys.argv.extend(["--server.port", os.environ['PORT']])
     sys.exit(stcli.main())
@@ -11,33 +11,73 @@ This script executes the complete offline processing pipeline:
 6. Validate processing results
 """
 
+import os
 import sys
+import time
 import logging
+import logging.handlers
 import json
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from datetime import datetime
+from itertools import islice
+
+import numpy as np
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.models.config import AppConfig
-from src.processors.offline_processor import OfflineProcessor
-from src.storage.metadata_store import MetadataStore
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Image extensions counted by validate_dataset (matched case-insensitively)
+SUPPORTED_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'})
 
 
 def setup_logging(log_level: str = "INFO") -> logging.Logger:
     """Set up logging configuration."""
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    
+    # Buffer file records so the processing loop does not pay a write per
+    # line; errors flush immediately and logging.shutdown() flushes the rest
+    file_handler = logging.FileHandler('offline_processing.log', delay=True)
+    file_handler.setFormatter(logging.Formatter(log_format))
+    buffered_handler = logging.handlers.MemoryHandler(
+        capacity=1024, flushLevel=logging.ERROR, target=file_handler
+    )
+    
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler('offline_processing.log')
+            buffered_handler
         ]
     )
     return logging.getLogger(__name__)
 
 
+def _scan_category(category_path: Path) -> Optional[List[str]]:
+    """Return sorted image file names in a category directory, or None if it is missing."""
+    if not category_path.exists():
+        return None
+    
+    # Count image files in a single directory pass
+    image_files = []
+    with os.scandir(category_path) as entries:
+        for entry in entries:
+            if (entry.is_file() and
+                    os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTS):
+                image_files.append(entry.name)
+    image_files.sort()
+    return image_files
+
+
 def validate_dataset(image_directory: Path) -> dict:
     """Validate the dataset before processing."""
     validation_report = {
@@ -51,26 +91,22 @@ def validate_dataset(image_directory: Path) -> dict:
     if not image_directory.exists():
         return validation_report
     
-    # Check each category directory
+    # Scan the category directories concurrently; listing is I/O-bound
     categories = ["brick_buildings", "glass_steel", "stone_facades", "mixed_materials"]
-    supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+    with ThreadPoolExecutor(max_workers=len(categories)) as executor:
+        scans = list(executor.map(_scan_category, [image_directory / c for c in categories]))
     
-    for category in categories:
-        category_path = image_directory / category
-        if category_path.exists():
-            # Count image files
-            image_files = []
-            for ext in supported_extensions:
-                image_files.extend(category_path.glob(f"*{ext}"))
-                image_files.extend(category_path.glob(f"*{ext.upper()}"))
+    for category, image_files in zip(categories, scans):
+        if image_files is not None:
+            image_count = len(image_files)
             
             validation_report["categories"][category] = {
                 "exists": True,
-                "image_count": len(image_files),
-                "files": [f.name for f in sorted(image_files)]
+                "image_count": image_count,
+                "files": image_files
             }
-            validation_report["total_images"] += len(image_files)
-            validation_report["supported_formats"] += len(image_files)
+            validation_report["total_images"] += image_count
+            validation_report["supported_formats"] += image_count
         else:
             validation_report["categories"][category] = {
                 "exists": False,
@@ -95,8 +131,10 @@ def run_processing_pipeline(config: AppConfig, logger: logging.Logger) -> dict:
     image_directory = Path(config.image_directory)
     validation = validate_dataset(image_directory)
     
-    logger.info(f"Dataset validation: {validation['validation_passed']}")
-    logger.info(f"Total images found: {validation['total_images']}")
+    logger.info(
+        "Dataset validation: %s\nTotal images found: %d",
+        validation['validation_passed'], validation['total_images']
+    )
     
     if not validation["validation_passed"]:
         logger.error("Dataset validation failed")
@@ -106,6 +144,9 @@ def run_processing_pipeline(config: AppConfig, logger: logging.Logger) -> dict:
             "validation": validation
         }
     
+    # Deferred so a failed dataset check does not pay for torch/CLIP imports
+    from src.processors.offline_processor import OfflineProcessor
+    
     # Initialize processing components
     try:
         logger.info("Initializing processing components...")
@@ -126,13 +167,12 @@ def run_processing_pipeline(config: AppConfig, logger: logging.Logger) -> dict:
     # Process images
     try:
         logger.info("Starting image processing...")
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Process all images (reprocess to ensure fresh embeddings)
         processed_count = processor.reprocess_all_images()
         
-        end_time = datetime.now()
-        processing_time = (end_time - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         
         logger.info(f"Processing completed: {processed_count} images in {processing_time:.2f} seconds")
         
@@ -149,7 +189,10 @@ def run_processing_pipeline(config: AppConfig, logger: logging.Logger) -> dict:
             "images_per_second": processed_count / processing_time if processing_time > 0 else 0,
             "initial_status": initial_status,
             "final_status": final_status,
-            "validation": validation
+            "validation": validation,
+            # Handed to validation so it reuses the already loaded metadata;
+            # removed by main() before the report is written
+            "metadata_store": processor.metadata_store
         }
         
     except Exception as e:
@@ -166,13 +209,27 @@ def run_processing_pipeline(config: AppConfig, logger: logging.Logger) -> dict:
         }
 
 
-def validate_processing_results(config: AppConfig, logger: logging.Logger) -> dict:
-    """Validate the results of offline processing."""
+def validate_processing_results(config: AppConfig, logger: logging.Logger,
+                                metadata_store=None) -> dict:
+    """
+    Validate the results of offline processing.
+    
+    Args:
+        config: Application configuration
+        logger: Logger for progress output
+        metadata_store: Optional MetadataStore to reuse; a new one is loaded
+            from config.metadata_file when omitted
+        
+    Returns:
+        dict: Validation results
+    """
     logger.info("Validating processing results...")
     
     try:
-        # Initialize metadata store
-        metadata_store = MetadataStore(config)
+        # Reuse the pipeline's metadata store to avoid re-reading the file
+        if metadata_store is None:
+            from src.storage.metadata_store import MetadataStore
+            metadata_store = MetadataStore(config)
         
         # Load all metadata
         all_metadata = metadata_store.load_all_metadata()
@@ -181,42 +238,38 @@ def validate_processing_results(config: AppConfig, logger: logging.Logger) -> di
         storage_stats = metadata_store.get_storage_stats()
         
         # Validate metadata completeness
+        total_entries = len(all_metadata)
         validation_results = {
-            "total_metadata_entries": len(all_metadata),
+            "total_metadata_entries": total_entries,
             "storage_stats": storage_stats,
             "sample_metadata": {},
             "validation_passed": True,
             "issues": []
         }
         
-        # Check each metadata entry
-        missing_embeddings = 0
-        missing_descriptions = 0
-        missing_features = 0
-        
-        # Sample a few entries for detailed validation
-        sample_paths = list(all_metadata.keys())[:5]
-        
-        for path, metadata in all_metadata.items():
-            # Check for missing data
-            if metadata.embedding is None or len(metadata.embedding) == 0:
-                missing_embeddings += 1
-            
-            if not metadata.description or metadata.description.strip() == "":
-                missing_descriptions += 1
-            
-            if not metadata.features or len(metadata.features) == 0:
-                missing_features += 1
-            
-            # Add to sample if in sample paths
-            if path in sample_paths:
-                validation_results["sample_metadata"][path] = {
-                    "description": metadata.description,
-                    "features": metadata.features,
-                    "embedding_size": len(metadata.embedding) if metadata.embedding is not None else 0,
-                    "file_size": metadata.file_size,
-                    "dimensions": metadata.dimensions
-                }
+        # Flag missing data straight into a preallocated structured array,
+        # without an intermediate list of tuples, then count each field in bulk
+        missing = np.fromiter(
+            ((metadata.embedding is None or len(metadata.embedding) == 0,
+              not metadata.description or not metadata.description.strip(),
+              not metadata.features)
+             for metadata in all_metadata.values()),
+            dtype=[('embedding', np.bool_), ('description', np.bool_), ('features', np.bool_)],
+            count=total_entries
+        )
+        missing_embeddings = int(np.count_nonzero(missing['embedding']))
+        missing_descriptions = int(np.count_nonzero(missing['description']))
+        missing_features = int(np.count_nonzero(missing['features']))
+        
+        # Sample the first few entries for detailed validation
+        for path, metadata in islice(all_metadata.items(), 5):
+            validation_results["sample_metadata"][path] = {
+                "description": metadata.description,
+                "features": metadata.features,
+                "embedding_size": len(metadata.embedding) if metadata.embedding is not None else 0,
+                "file_size": metadata.file_size,
+                "dimensions": metadata.dimensions
+            }
         
         # Record issues
         if missing_embeddings > 0:
@@ -231,19 +284,27 @@ def validate_processing_results(config: AppConfig, logger: logging.Logger) -> di
         # Overall validation
         validation_results["validation_passed"] = (
             len(validation_results["issues"]) == 0 and
-            len(all_metadata) >= 20
+            total_entries >= 20
         )
         
+        percent_per_entry = 100.0 / total_entries if total_entries else 0.0
         validation_results["completeness"] = {
-            "embeddings": (len(all_metadata) - missing_embeddings) / len(all_metadata) * 100 if all_metadata else 0,
-            "descriptions": (len(all_metadata) - missing_descriptions) / len(all_metadata) * 100 if all_metadata else 0,
-            "features": (len(all_metadata) - missing_features) / len(all_metadata) * 100 if all_metadata else 0
+            "embeddings": (total_entries - missing_embeddings) * percent_per_entry,
+            "descriptions": (total_entries - missing_descriptions) * percent_per_entry,
+            "features": (total_entries - missing_features) * percent_per_entry
         }
         
-        logger.info(f"Validation completed: {validation_results['validation_passed']}")
-        logger.info(f"Completeness - Embeddings: {validation_results['completeness']['embeddings']:.1f}%")
-        logger.info(f"Completeness - Descriptions: {validation_results['completeness']['descriptions']:.1f}%")
-        logger.info(f"Completeness - Features: {validation_results['completeness']['features']:.1f}%")
+        completeness = validation_results["completeness"]
+        logger.info(
+            "Validation completed: %s\n"
+            "Completeness - Embeddings: %.1f%%\n"
+            "Completeness - Descriptions: %.1f%%\n"
+            "Completeness - Features: %.1f%%",
+            validation_results["validation_passed"],
+            completeness["embeddings"],
+            completeness["descriptions"],
+            completeness["features"]
+        )
         
         return validation_results
         
@@ -296,18 +357,23 @@ def main():
         # Ensure directories exist
         config.ensure_directories_exist()
         
-        logger.info(f"Configuration loaded:")
-        logger.info(f"  Image directory: {config.image_directory}")
-        logger.info(f"  Metadata file: {config.metadata_file}")
-        logger.info(f"  CLIP model: {config.clip_model_name}")
-        logger.info(f"  Batch size: {config.batch_size}")
+        logger.info(
+            "Configuration loaded:\n"
+            "  Image directory: %s\n"
+            "  Metadata file: %s\n"
+            "  CLIP model: %s\n"
+            "  Batch size: %d",
+            config.image_directory, config.metadata_file,
+            config.clip_model_name, config.batch_size
+        )
         
         # Run processing pipeline
         processing_results = run_processing_pipeline(config, logger)
+        metadata_store = processing_results.pop("metadata_store", None)
         
         # Validate results if processing succeeded
         if processing_results.get("success", False):
-            validation_results = validate_processing_results(config, logger)
+            validation_results = validate_processing_results(config, logger, metadata_store)
         else:
             validation_results = {"validation_passed": False, "error": "Processing failed"}
         
@@ -316,29 +382,39 @@ def main():
         
         # Save report
         report_file = "offline_processing_report.json"
-        with open(report_file, 'w') as f:
-            json.dump(report, f, indent=2)
+        if orjson is not None:
+            with open(report_file, 'wb') as f:
+                f.write(orjson.dumps(report, option=(
+                    orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                )))
+        else:
+            with open(report_file, 'w') as f:
+                json.dump(report, f, indent=2)
         
         # Print summary
-        print(f"\nProcessing Summary:")
-        print(f"  Overall Success: {report['summary']['overall_success']}")
-        print(f"  Images Processed: {report['summary']['total_images_processed']}")
-        print(f"  Processing Time: {report['summary']['processing_time']:.2f} seconds")
-        print(f"  Metadata Entries: {report['summary']['metadata_entries']}")
-        print(f"  Ready for Search: {report['summary']['ready_for_search']}")
-        
-        if report['summary']['ready_for_search']:
-            print(f"\n✅ Offline processing completed successfully!")
-            print(f"   The system is ready for search functionality.")
+        summary = report['summary']
+        lines = [
+            "\nProcessing Summary:",
+            f"  Overall Success: {summary['overall_success']}",
+            f"  Images Processed: {summary['total_images_processed']}",
+            f"  Processing Time: {summary['processing_time']:.2f} seconds",
+            f"  Metadata Entries: {summary['metadata_entries']}",
+            f"  Ready for Search: {summary['ready_for_search']}",
+        ]
+        
+        if summary['ready_for_search']:
+            lines.append("\n✅ Offline processing completed successfully!")
+            lines.append("   The system is ready for search functionality.")
         else:
-            print(f"\n❌ Processing completed with issues.")
+            lines.append("\n❌ Processing completed with issues.")
             if processing_results.get("error"):
-                print(f"   Processing Error: {processing_results['error']}")
+                lines.append(f"   Processing Error: {processing_results['error']}")
             if validation_results.get("error"):
-                print(f"   Validation Error: {validation_results['error']}")
+                lines.append(f"   Validation Error: {validation_results['error']}")
         
-        print(f"\nDetailed report saved to: {report_file}")
-        print(f"Processing log saved to: offline_processing.log")
+        lines.append(f"\nDetailed report saved to: {report_file}")
+        lines.append("Processing log saved to: offline_processing.log")
+        print("\n".join(lines))
         
         # Return appropriate exit code
         return 0 if report['summary']['overall_success'] else 1
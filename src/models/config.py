@@ -3,11 +3,45 @@ Configuration management for the AI architectural search system.
 """
 import os
 import json
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 from typing import Dict, Any, Optional
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+
+def _parse_env_bool(value: str) -> bool:
+    """Interpret an environment variable string as a boolean flag."""
+    return value.strip().lower() in ('true', '1', 'yes', 'on')
+
+
+def _add_slots(cls):
+    """
+    Rebuild a dataclass with __slots__ for its fields.
+    
+    Equivalent to dataclass(slots=True), which needs Python 3.10+.
+    
+    Args:
+        cls: Dataclass to rebuild
+        
+    Returns:
+        New class with the same fields and methods but no per-instance __dict__
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    cls_dict['__slots__'] = field_names
+    for name in field_names:
+        # Defaults live in the generated __init__ and would clash with the slots
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@_add_slots
 @dataclass
 class AppConfig:
     """
@@ -23,6 +57,13 @@ class AppConfig:
         cache_embeddings: Whether to cache embeddings for performance
         web_port: Port for Streamlit web interface
         web_host: Host address for web interface
+        embedding_dtype: Precision used for embeddings on disk ('float16', 'float32',
+            or 'int8' with a per-vector scale)
+        metadata_format: Internal storage format for metadata ('pickle' or 'json')
+        pretty_json: Whether to indent JSON metadata files for readability
+        compress_embeddings: Whether to zstd-compress embeddings in JSON metadata
+        strict_sanitize: Whether to always replace NaN/inf similarity scores and
+            clip them to [-1, 1]; otherwise this only happens once a NaN is seen
     """
     image_directory: str = "images/"
     metadata_file: str = "image_metadata.json"
@@ -33,6 +74,23 @@ class AppConfig:
     cache_embeddings: bool = True
     web_port: int = 8501
     web_host: str = "localhost"
+    embedding_dtype: str = "float16"
+    metadata_format: str = "json"
+    pretty_json: bool = False
+    compress_embeddings: bool = True
+    strict_sanitize: bool = False
+    
+    # Type converters for environment overrides; unlisted fields stay strings
+    _ENV_CONVERTERS = {
+        'max_results': int,
+        'batch_size': int,
+        'web_port': int,
+        'similarity_threshold': float,
+        'cache_embeddings': _parse_env_bool,
+        'pretty_json': _parse_env_bool,
+        'compress_embeddings': _parse_env_bool,
+        'strict_sanitize': _parse_env_bool,
+    }
     
     def __post_init__(self):
         """Validate configuration values after initialization."""
@@ -77,6 +135,26 @@ class AppConfig:
         # Validate web host
         if not isinstance(self.web_host, str) or not self.web_host.strip():
             raise ValueError("Web host must be a non-empty string")
+        
+        # Validate embedding dtype
+        if self.embedding_dtype not in ('float16', 'float32', 'int8'):
+            raise ValueError("Embedding dtype must be 'float16', 'float32' or 'int8'")
+        
+        # Validate metadata format
+        if self.metadata_format not in ('pickle', 'json'):
+            raise ValueError("Metadata format must be 'pickle' or 'json'")
+        
+        # Validate pretty JSON flag
+        if not isinstance(self.pretty_json, bool):
+            raise TypeError("Pretty JSON must be a boolean")
+        
+        # Validate compress embeddings
+        if not isinstance(self.compress_embeddings, bool):
+            raise TypeError("Compress embeddings must be a boolean")
+        
+        # Validate strict sanitize flag
+        if not isinstance(self.strict_sanitize, bool):
+            raise TypeError("Strict sanitize must be a boolean")
     
     def get_image_directory_path(self) -> Path:
         """Get Path object for image directory."""
@@ -88,14 +166,11 @@ class AppConfig:
     
     def ensure_directories_exist(self):
         """Create necessary directories if they don't exist."""
-        img_dir = self.get_image_directory_path()
-        if not img_dir.exists():
-            img_dir.mkdir(parents=True, exist_ok=True)
+        # exist_ok already covers existing directories, so no separate check
+        self.get_image_directory_path().mkdir(parents=True, exist_ok=True)
         
         # Create metadata file directory if needed
-        metadata_dir = self.get_metadata_file_path().parent
-        if not metadata_dir.exists():
-            metadata_dir.mkdir(parents=True, exist_ok=True)
+        self.get_metadata_file_path().parent.mkdir(parents=True, exist_ok=True)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary."""
@@ -113,8 +188,7 @@ class AppConfig:
             AppConfig instance with validated values
         """
         # Filter out unknown keys
-        valid_keys = {field.name for field in cls.__dataclass_fields__.values()}
-        filtered_data = {k: v for k, v in data.items() if k in valid_keys}
+        filtered_data = {k: data[k] for k in data.keys() & cls._FIELD_NAMES}
         
         return cls(**filtered_data)
     
@@ -128,6 +202,11 @@ class AppConfig:
         config_file = Path(config_path)
         config_file.parent.mkdir(parents=True, exist_ok=True)
         
+        if orjson is not None:
+            with open(config_file, 'wb') as f:
+                f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+            return
+        
         with open(config_file, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
     
@@ -142,6 +221,23 @@ class AppConfig:
         Returns:
             AppConfig instance loaded from file
             
+        Raises:
+            FileNotFoundError: If config file doesn't exist
+            json.JSONDecodeError: If config file contains invalid JSON
+        """
+        return cls(**cls._file_overrides(config_path))
+    
+    @classmethod
+    def _file_overrides(cls, config_path: str) -> Dict[str, Any]:
+        """
+        Read known configuration values from a JSON file without validating them.
+        
+        Args:
+            config_path: Path to configuration file
+            
+        Returns:
+            Dictionary of field values present in the file
+            
         Raises:
             FileNotFoundError: If config file doesn't exist
             json.JSONDecodeError: If config file contains invalid JSON
@@ -153,7 +249,7 @@ class AppConfig:
         with open(config_file, 'r') as f:
             data = json.load(f)
         
-        return cls.from_dict(data)
+        return {k: data[k] for k in data.keys() & cls._FIELD_NAMES}
     
     @classmethod
     def load_from_env(cls) -> 'AppConfig':
@@ -166,6 +262,19 @@ class AppConfig:
         Returns:
             AppConfig instance with values from environment
         """
+        return cls(**cls._env_overrides())
+    
+    @classmethod
+    def _env_overrides(cls) -> Dict[str, Any]:
+        """
+        Read configuration values from environment variables without validating them.
+        
+        Returns:
+            Dictionary of field values set in the environment
+            
+        Raises:
+            ValueError: If a numeric environment variable cannot be parsed
+        """
         env_mapping = {
             'AI_SEARCH_IMAGE_DIRECTORY': 'image_directory',
             'AI_SEARCH_METADATA_FILE': 'metadata_file',
@@ -176,6 +285,11 @@ class AppConfig:
             'AI_SEARCH_CACHE_EMBEDDINGS': 'cache_embeddings',
             'AI_SEARCH_WEB_PORT': 'web_port',
             'AI_SEARCH_WEB_HOST': 'web_host',
+            'AI_SEARCH_EMBEDDING_DTYPE': 'embedding_dtype',
+            'AI_SEARCH_METADATA_FORMAT': 'metadata_format',
+            'AI_SEARCH_PRETTY_JSON': 'pretty_json',
+            'AI_SEARCH_COMPRESS_EMBEDDINGS': 'compress_embeddings',
+            'AI_SEARCH_STRICT_SANITIZE': 'strict_sanitize',
         }
         
         config_data = {}
@@ -184,22 +298,13 @@ class AppConfig:
             value = os.getenv(env_var)
             if value is not None:
                 # Convert string values to appropriate types
-                if config_key in ['max_results', 'batch_size', 'web_port']:
-                    try:
-                        config_data[config_key] = int(value)
-                    except ValueError:
-                        raise ValueError(f"Invalid integer value for {env_var}: {value}")
-                elif config_key == 'similarity_threshold':
-                    try:
-                        config_data[config_key] = float(value)
-                    except ValueError:
-                        raise ValueError(f"Invalid float value for {env_var}: {value}")
-                elif config_key == 'cache_embeddings':
-                    config_data[config_key] = value.lower() in ('true', '1', 'yes', 'on')
-                else:
-                    config_data[config_key] = value
-        
-        return cls.from_dict(config_data)
+                convert = cls._ENV_CONVERTERS.get(config_key, str)
+                try:
+                    config_data[config_key] = convert(value)
+                except ValueError:
+                    raise ValueError(f"Invalid value for {env_var}: {value}")
+        
+        return config_data
     
     @classmethod
     def load_config(cls, config_path: Optional[str] = None, 
@@ -207,6 +312,9 @@ class AppConfig:
         """
         Load configuration with fallback priority: file -> environment -> defaults.
         
+        Overrides from each source are layered into one dictionary, so the
+        configuration is constructed and validated once.
+        
         Args:
             config_path: Optional path to configuration file
             use_env: Whether to load from environment variables
@@ -214,34 +322,32 @@ class AppConfig:
         Returns:
             AppConfig instance with merged configuration
         """
-        # Start with defaults
-        config = cls()
-        
-        # Override with environment variables if requested
+        env_overrides = {}
         if use_env:
             try:
-                env_config = cls.load_from_env()
-                # Merge non-default values from environment
-                for key, value in env_config.to_dict().items():
-                    setattr(config, key, value)
+                env_overrides = cls._env_overrides()
             except Exception:
                 # Continue with defaults if environment loading fails
                 pass
         
-        # Override with file configuration if provided
+        file_overrides = {}
         if config_path:
             try:
-                file_config = cls.load_from_file(config_path)
-                # Merge values from file
-                for key, value in file_config.to_dict().items():
-                    setattr(config, key, value)
+                file_overrides = cls._file_overrides(config_path)
             except FileNotFoundError:
                 # Continue with current config if file doesn't exist
                 pass
         
-        # Validate final configuration
-        config._validate_config()
-        return config
+        try:
+            return cls(**{**env_overrides, **file_overrides})
+        except (TypeError, ValueError):
+            if not env_overrides:
+                raise
+            # Invalid environment values fall back to defaults
+            return cls(**file_overrides)
+
+# Dataclass field names, computed once for from_dict filtering
+AppConfig._FIELD_NAMES = frozenset(AppConfig.__dataclass_fields__)
 
 
 def get_default_config() -> AppConfig:
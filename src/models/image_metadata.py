@@ -4,9 +4,55 @@ Image metadata model for storing and managing architectural image information.
 from dataclasses import dataclass, asdict
 from typing import List, Tuple, Optional, Dict, Any
 from datetime import datetime
+import base64
 import json
 import numpy as np
 
+try:
+    import zstandard
+except ImportError:
+    # Optional dependency; embeddings are stored uncompressed without it
+    zstandard = None
+
+# Shared codec objects, reused across records instead of built per call
+if zstandard is not None:
+    _ZSTD_COMPRESSOR = zstandard.ZstdCompressor(level=3)
+    _ZSTD_DECOMPRESSOR = zstandard.ZstdDecompressor()
+else:
+    _ZSTD_COMPRESSOR = None
+    _ZSTD_DECOMPRESSOR = None
+
+
+def quantize_embedding(embedding: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Quantize an embedding to int8 with a symmetric per-vector scale.
+    
+    Args:
+        embedding: Float embedding vector
+        
+    Returns:
+        Tuple[np.ndarray, float]: int8 codes and the scale that maps them back
+        to floats (embedding ~= codes * scale)
+    """
+    max_abs = float(np.abs(embedding).max()) if embedding.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    codes = np.clip(np.rint(embedding / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def dequantize_embedding(codes: np.ndarray, scale: float) -> np.ndarray:
+    """
+    Restore a float32 embedding from int8 codes and their per-vector scale.
+    
+    Args:
+        codes: int8 embedding codes
+        scale: Scale returned by quantize_embedding
+        
+    Returns:
+        np.ndarray: float32 embedding
+    """
+    return codes.astype(np.float32) * np.float32(scale)
+
 
 @dataclass
 class ImageMetadata:
@@ -60,16 +106,36 @@ class ImageMetadata:
         if self.processed_date is None:
             self.processed_date = datetime.now()
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, embedding_dtype: str = 'float32', compress: bool = False) -> Dict[str, Any]:
         """
         Convert ImageMetadata to dictionary for JSON serialization.
         
+        Args:
+            embedding_dtype: Precision to store the embedding with ('float16', 'float32',
+                or 'int8' with a per-vector scale under 'embedding_scale')
+            compress: Store the embedding as base64 zstd bytes under 'embedding_z'
+                when the zstandard package is available
+        
         Returns:
             Dictionary representation with embedding converted to list
         """
         data = asdict(self)
+        embedding = self.embedding
+        if embedding_dtype == 'int8':
+            embedding, data['embedding_scale'] = quantize_embedding(embedding)
         # Convert numpy array to list for JSON serialization
-        data['embedding'] = self.embedding.tolist()
+        if compress and zstandard is not None:
+            raw = embedding.astype(embedding_dtype).tobytes()
+            data['embedding_z'] = base64.b64encode(
+                _ZSTD_COMPRESSOR.compress(raw)
+            ).decode('ascii')
+            del data['embedding']
+        elif embedding_dtype == 'float16':
+            # Round to float16 precision, then widen for JSON-serializable floats
+            data['embedding'] = self.embedding.astype(np.float16).astype(np.float32).tolist()
+        else:
+            data['embedding'] = embedding.tolist()
+        data['dtype'] = embedding_dtype
         # Convert datetime to ISO string
         if self.processed_date:
             data['processed_date'] = self.processed_date.isoformat()
@@ -90,15 +156,32 @@ class ImageMetadata:
             ValueError: If required fields are missing
             TypeError: If data types are incorrect
         """
+        # Decompress embedding stored as base64 zstd bytes
+        if 'embedding_z' in data:
+            if zstandard is None:
+                raise ValueError("zstandard is required to load compressed embeddings")
+            raw = _ZSTD_DECOMPRESSOR.decompress(base64.b64decode(data.pop('embedding_z')))
+            embedding = np.frombuffer(raw, dtype=data.get('dtype', 'float32'))
+            # int8 codes are rescaled below; floats are copied out of the read-only buffer
+            data['embedding'] = embedding if 'embedding_scale' in data else embedding.astype(np.float32)
+        
         # Validate required fields
         required_fields = ['path', 'embedding', 'description', 'features']
         for field in required_fields:
             if field not in data:
                 raise ValueError(f"Required field '{field}' is missing")
         
+        # Stored precision only matters on disk; computation always uses float32
+        data.pop('dtype', None)
+        scale = data.pop('embedding_scale', None)
+        if scale is not None:
+            data['embedding'] = dequantize_embedding(np.asarray(data['embedding']), scale)
+        
         # Convert embedding list back to numpy array
         if isinstance(data['embedding'], list):
             data['embedding'] = np.array(data['embedding'], dtype=np.float32)
+        elif isinstance(data['embedding'], np.ndarray) and data['embedding'].dtype != np.float32:
+            data['embedding'] = data['embedding'].astype(np.float32)
         
         # Convert ISO string back to datetime
         if 'processed_date' in data and isinstance(data['processed_date'], str):
@@ -150,10 +233,8 @@ class ImageMetadata:
         if not isinstance(other_embedding, np.ndarray):
             raise TypeError("Other embedding must be a numpy array")
             
-        # Normalize vectors
-        norm_self = self.embedding / np.linalg.norm(self.embedding)
-        norm_other = other_embedding / np.linalg.norm(other_embedding)
-        
-        # Calculate cosine similarity
-        similarity = np.dot(norm_self, norm_other)
+        # Calculate cosine similarity from the squared norms
+        similarity = np.dot(self.embedding, other_embedding) / np.sqrt(
+            np.vdot(self.embedding, self.embedding) * np.vdot(other_embedding, other_embedding)
+        )
         return float(similarity)
\ No newline at end of file
@@ -1,7 +1,7 @@
 """
 Search-related data models for query processing and result handling.
 """
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import json
@@ -24,7 +24,7 @@ class SearchResult:
     confidence_score: float
     description: str
     similarity_score: float
-    features: Optional[List[str]] = None
+    features: List[str] = field(default_factory=list)
     
     def __post_init__(self):
         """Validate fields after initialization."""
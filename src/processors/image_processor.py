@@ -2,9 +2,10 @@
 Image processing and analysis for architectural feature extraction and description generation.
 """
 import os
+import re
 import logging
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Union
+from typing import List, Dict, Tuple, Optional, Union, Iterator
 from PIL import Image
 import numpy as np
 from datetime import datetime
@@ -54,6 +55,13 @@ class ImageProcessor:
         ]
     }
     
+    # Supported image file extensions (lower-case)
+    SUPPORTED_FORMATS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'})
+    
+    # Keyword patterns used to categorize features in a single regex scan
+    MATERIAL_PATTERN = re.compile(r'brick|stone|glass|steel|concrete|wood')
+    BUILDING_TYPE_PATTERN = re.compile(r'building|house')
+    
     # Common architectural description templates
     DESCRIPTION_TEMPLATES = [
         "{material} {building_type} with {roof_type} and {window_style}",
@@ -75,7 +83,11 @@ class ImageProcessor:
         self.logger = logging.getLogger(__name__)
         
         # Supported image formats
-        self.supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+        self.supported_formats = self.SUPPORTED_FORMATS
+        
+        # Unit-normalized text embeddings of ARCHITECTURAL_FEATURES, built on first use
+        self._feature_names: List[str] = []
+        self._feature_matrix: Optional[np.ndarray] = None
     
     def _is_valid_image(self, image_path: Path) -> bool:
         """
@@ -114,6 +126,39 @@ class ImageProcessor:
             self.logger.error(f"Failed to get image info for {image_path}: {e}")
             raise ValueError(f"Could not read image information: {e}")
     
+    def _get_feature_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Get the architectural feature terms and their stacked text embeddings.
+        
+        The terms never change, so they are encoded once per processor instead
+        of once per image; terms that fail to encode are skipped.
+        
+        Returns:
+            Tuple[List[str], np.ndarray]: Feature terms and an (F, D) matrix of
+            their L2-normalized embeddings
+        """
+        if self._feature_matrix is None:
+            names = []
+            embeddings = []
+            for feature_list in self.ARCHITECTURAL_FEATURES.values():
+                for feature in feature_list:
+                    try:
+                        embeddings.append(self.model_manager.generate_text_embedding(feature))
+                        names.append(feature)
+                    except Exception as e:
+                        self.logger.debug(f"Failed to process feature '{feature}': {e}")
+            
+            if embeddings:
+                matrix = np.stack(embeddings).astype(np.float32, copy=False)
+                matrix /= np.sqrt(np.einsum('ij,ij->i', matrix, matrix))[:, np.newaxis]
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            
+            self._feature_names = names
+            self._feature_matrix = matrix
+        
+        return self._feature_names, self._feature_matrix
+    
     def _extract_features_from_embedding(self, embedding: np.ndarray, 
                                        image_path: Path) -> List[str]:
         """
@@ -129,22 +174,14 @@ class ImageProcessor:
         features = []
         
         try:
-            # Generate embeddings for architectural feature terms
-            all_features = []
-            for category, feature_list in self.ARCHITECTURAL_FEATURES.items():
-                all_features.extend(feature_list)
-            
-            # Calculate similarities with feature terms
+            # Calculate similarities with all feature terms in one product
+            feature_names, feature_matrix = self._get_feature_matrix()
             feature_similarities = {}
             
-            for feature in all_features:
-                try:
-                    feature_embedding = self.model_manager.generate_text_embedding(feature)
-                    similarity = self.model_manager.calculate_similarity(embedding, feature_embedding)
-                    feature_similarities[feature] = similarity
-                except Exception as e:
-                    self.logger.debug(f"Failed to process feature '{feature}': {e}")
-                    continue
+            if feature_names:
+                embedding_norm = embedding / np.sqrt(np.vdot(embedding, embedding))
+                similarities = feature_matrix @ embedding_norm.astype(np.float32, copy=False)
+                feature_similarities = dict(zip(feature_names, similarities.tolist()))
             
             # Select top features above threshold
             similarity_threshold = 0.25  # Adjust based on testing
@@ -222,12 +259,12 @@ class ImageProcessor:
         """
         try:
             # Categorize features
-            materials = [f for f in features if any(m in f for m in 
-                        ['brick', 'stone', 'glass', 'steel', 'concrete', 'wood'])]
+            materials = [f for f in features if self.MATERIAL_PATTERN.search(f)]
             roof_types = [f for f in features if 'roof' in f]
             window_styles = [f for f in features if 'window' in f]
-            building_types = [f for f in features if 'building' in f or 'house' in f]
-            architectural_elements = [f for f in features if f not in materials + roof_types + window_styles + building_types]
+            building_types = [f for f in features if self.BUILDING_TYPE_PATTERN.search(f)]
+            categorized = set(materials).union(roof_types, window_styles, building_types)
+            architectural_elements = [f for f in features if f not in categorized]
             
             # Select primary elements for description
             material = materials[0] if materials else "modern"
@@ -314,6 +351,38 @@ class ImageProcessor:
             self.logger.error(f"Failed to process image {image_path}: {e}")
             raise ValueError(f"Image processing failed: {e}")
     
+    def _find_image_files(self, directory_path: Path, recursive: bool = True) -> List[Path]:
+        """
+        Collect supported image files with one os.scandir pass per directory.
+        
+        Extensions are matched case-insensitively, so a single traversal covers
+        both lower- and upper-case suffixes.
+        
+        Args:
+            directory_path: Directory to scan
+            recursive: Whether to descend into subdirectories
+            
+        Returns:
+            List[Path]: Image files found (unsorted)
+        """
+        image_files = []
+        pending = [str(directory_path)]
+        
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in self.supported_formats:
+                            image_files.append(Path(entry.path))
+            except OSError as e:
+                self.logger.warning(f"Cannot scan directory {current}: {e}")
+        
+        return image_files
+    
     def process_directory(self, directory_path: Union[str, Path], 
                          recursive: bool = True) -> List[ImageMetadata]:
         """
@@ -326,6 +395,27 @@ class ImageProcessor:
         Returns:
             List[ImageMetadata]: List of metadata for all processed images
             
+        Raises:
+            FileNotFoundError: If directory doesn't exist
+        """
+        return list(self.process_directory_iter(directory_path, recursive))
+    
+    def process_directory_iter(self, directory_path: Union[str, Path],
+                               recursive: bool = True) -> Iterator[ImageMetadata]:
+        """
+        Process all images in a directory, yielding metadata as each image finishes.
+        
+        The directory is checked and scanned immediately; images are processed
+        lazily as the iterator is consumed, so callers can persist results in
+        chunks instead of holding the whole directory in memory.
+        
+        Args:
+            directory_path: Path to directory containing images
+            recursive: Whether to process subdirectories
+            
+        Returns:
+            Iterator[ImageMetadata]: Metadata for each successfully processed image
+            
         Raises:
             FileNotFoundError: If directory doesn't exist
         """
@@ -339,49 +429,49 @@ class ImageProcessor:
         
         self.logger.info(f"Processing directory: {directory_path} (recursive={recursive})")
         
-        # Find all image files
-        image_files = []
-        
-        if recursive:
-            for ext in self.supported_formats:
-                image_files.extend(directory_path.rglob(f"*{ext}"))
-                image_files.extend(directory_path.rglob(f"*{ext.upper()}"))
-        else:
-            for ext in self.supported_formats:
-                image_files.extend(directory_path.glob(f"*{ext}"))
-                image_files.extend(directory_path.glob(f"*{ext.upper()}"))
-        
-        # Remove duplicates and sort
-        image_files = sorted(list(set(image_files)))
+        # Find all image files in a single directory walk
+        image_files = sorted(self._find_image_files(directory_path, recursive))
         
         self.logger.info(f"Found {len(image_files)} image files")
         
         if not image_files:
             self.logger.warning(f"No image files found in {directory_path}")
-            return []
         
-        # Process images
-        metadata_list = []
+        return self._iter_process_images(image_files)
+    
+    def _iter_process_images(self, image_files: List[Path]) -> Iterator[ImageMetadata]:
+        """
+        Process images one at a time, skipping and logging failures.
+        
+        Args:
+            image_files: Image paths to process, in order
+            
+        Returns:
+            Iterator[ImageMetadata]: Metadata for each successfully processed image
+        """
+        if not image_files:
+            return
+        
         processed_count = 0
         failed_count = 0
         
         for image_path in image_files:
             try:
                 metadata = self.process_single_image(image_path)
-                metadata_list.append(metadata)
-                processed_count += 1
-                
-                # Log progress
-                if processed_count % 10 == 0:
-                    self.logger.info(f"Processed {processed_count}/{len(image_files)} images")
-                    
             except Exception as e:
                 failed_count += 1
                 self.logger.warning(f"Failed to process {image_path}: {e}")
                 continue
+            
+            processed_count += 1
+            
+            # Log progress
+            if processed_count % 10 == 0:
+                self.logger.info(f"Processed {processed_count}/{len(image_files)} images")
+            
+            yield metadata
         
         self.logger.info(f"Directory processing complete: {processed_count} successful, {failed_count} failed")
-        return metadata_list
     
     def process_batch_images(self, image_paths: List[Union[str, Path]]) -> List[ImageMetadata]:
         """
@@ -7,7 +7,9 @@ import numpy as np
 from PIL import Image
 from typing import Union, List, Optional, Tuple
 import logging
+import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 from src.models.config import AppConfig
 
@@ -106,6 +108,22 @@ class ModelManager:
             self.logger.error(f"Failed to preprocess image {image_path}: {e}")
             raise ValueError(f"Could not process image '{image_path}': {e}")
     
+    def _try_preprocess_image(self, image_path: Union[str, Path]) -> Optional[torch.Tensor]:
+        """
+        Preprocess an image, logging and returning None instead of raising on failure.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Optional[torch.Tensor]: Preprocessed image tensor, or None if it could not be read
+        """
+        try:
+            return self.preprocess_image(image_path)
+        except Exception as e:
+            self.logger.warning(f"Skipping image {image_path}: {e}")
+            return None
+    
     def generate_image_embedding(self, image_path: Union[str, Path]) -> np.ndarray:
         """
         Generate CLIP embedding for a single image.
@@ -206,23 +224,50 @@ class ModelManager:
         
         self.logger.info(f"Processing {len(image_paths)} images in batches of {batch_size}")
         
-        for i in range(0, len(image_paths), batch_size):
-            batch_paths = image_paths[i:i + batch_size]
-            batch_embeddings = []
+        # Decoding and resizing are CPU-bound and mostly release the GIL, so
+        # preprocess each batch on a thread pool; inference stays on one model
+        decode_workers = max(1, min(batch_size, os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=decode_workers) as decode_pool:
+            self._encode_image_batches(image_paths, batch_size, decode_pool, embeddings)
+        
+        self.logger.info(f"Successfully processed {len(embeddings)} images")
+        return embeddings
+    
+    def _encode_image_batches(self, image_paths: List[Union[str, Path]], batch_size: int,
+                              decode_pool: ThreadPoolExecutor, embeddings: List[np.ndarray]):
+        """
+        Encode images batch by batch, appending the embeddings in input order.
+        
+        While one batch runs through the model, the next one is already being
+        decoded on the pool, so disk and decode latency hide behind inference.
+        
+        Args:
+            image_paths: List of paths to image files
+            batch_size: Number of images per forward pass
+            decode_pool: Thread pool used to preprocess images
+            embeddings: List the normalized embeddings are appended to
+        """
+        batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        pending = [decode_pool.submit(self._try_preprocess_image, path) for path in batches[0]]
+        
+        for batch_index, batch_paths in enumerate(batches):
+            decoded = pending
+            
+            # Queue the next batch's preprocessing so it overlaps this batch's inference
+            if batch_index + 1 < len(batches):
+                pending = [decode_pool.submit(self._try_preprocess_image, path)
+                           for path in batches[batch_index + 1]]
             
             try:
-                # Process each image in the batch
+                # Collect the preprocessed batch, keeping input order
                 batch_tensors = []
                 valid_paths = []
                 
-                for path in batch_paths:
-                    try:
-                        processed_image = self.preprocess_image(path)
+                for path, future in zip(batch_paths, decoded):
+                    processed_image = future.result()
+                    if processed_image is not None:
                         batch_tensors.append(processed_image)
                         valid_paths.append(path)
-                    except Exception as e:
-                        self.logger.warning(f"Skipping image {path}: {e}")
-                        continue
                 
                 if not batch_tensors:
                     continue
@@ -243,7 +288,7 @@ class ModelManager:
                     self.logger.debug(f"Processed {valid_paths[j]}")
                 
             except Exception as e:
-                self.logger.error(f"Failed to process batch {i//batch_size + 1}: {e}")
+                self.logger.error(f"Failed to process batch {batch_index + 1}: {e}")
                 # Continue with individual processing for this batch
                 for path in batch_paths:
                     try:
@@ -252,9 +297,6 @@ class ModelManager:
                     except Exception as individual_error:
                         self.logger.warning(f"Skipping image {path}: {individual_error}")
                         continue
-        
-        self.logger.info(f"Successfully processed {len(embeddings)} images")
-        return embeddings
     
     def calculate_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
         """
@@ -280,12 +322,11 @@ class ModelManager:
             raise ValueError("Embeddings cannot be empty")
         
         try:
-            # Normalize embeddings
-            norm1 = embedding1 / np.linalg.norm(embedding1)
-            norm2 = embedding2 / np.linalg.norm(embedding2)
-            
-            # Calculate cosine similarity
-            similarity = np.dot(norm1, norm2)
+            # Calculate cosine similarity; one sqrt of the squared norms replaces
+            # two linalg.norm calls and the normalized copies
+            similarity = np.dot(embedding1, embedding2) / np.sqrt(
+                np.vdot(embedding1, embedding1) * np.vdot(embedding2, embedding2)
+            )
             return float(similarity)
             
         except Exception as e:
@@ -2,6 +2,7 @@
 Offline processing orchestrator that combines image processing and metadata storage.
 """
 import logging
+from itertools import islice
 from pathlib import Path
 from typing import Union, List, Optional
 
@@ -18,6 +19,9 @@ class OfflineProcessor:
     a complete offline processing pipeline for architectural images.
     """
     
+    # Number of chunks reprocess_all_images buffers between metadata file writes
+    CHECKPOINT_EVERY_CHUNKS = 10
+    
     def __init__(self, config: AppConfig):
         """
         Initialize OfflineProcessor with configuration.
@@ -58,27 +62,31 @@ class OfflineProcessor:
         
         self.logger.info(f"Processing {len(images_to_process)} images")
         
-        # Process images in batches
+        # Process images in batches, writing the metadata file once at the end
         processed_count = 0
         batch_size = self.config.batch_size
         
-        for i in range(0, len(images_to_process), batch_size):
-            batch_paths = images_to_process[i:i + batch_size]
-            
-            try:
-                # Process batch
-                metadata_list = self.image_processor.process_batch_images(batch_paths)
-                
-                # Save metadata
-                if metadata_list:
-                    self.metadata_store.save_batch_metadata(metadata_list)
-                    processed_count += len(metadata_list)
-                
-                self.logger.info(f"Processed batch {i//batch_size + 1}: {len(metadata_list)} images")
+        self.metadata_store.begin_bulk()
+        try:
+            for i in range(0, len(images_to_process), batch_size):
+                batch_paths = images_to_process[i:i + batch_size]
                 
-            except Exception as e:
-                self.logger.error(f"Failed to process batch {i//batch_size + 1}: {e}")
-                continue
+                try:
+                    # Process batch
+                    metadata_list = self.image_processor.process_batch_images(batch_paths)
+                    
+                    # Save metadata
+                    if metadata_list:
+                        self.metadata_store.save_batch_metadata(metadata_list)
+                        processed_count += len(metadata_list)
+                    
+                    self.logger.info(f"Processed batch {i//batch_size + 1}: {len(metadata_list)} images")
+                    
+                except Exception as e:
+                    self.logger.error(f"Failed to process batch {i//batch_size + 1}: {e}")
+                    continue
+        finally:
+            self.metadata_store.commit_bulk()
         
         self.logger.info(f"Offline processing complete: {processed_count} images processed")
         return processed_count
@@ -102,15 +110,35 @@ class OfflineProcessor:
             self.logger.error(f"Image directory not found: {image_directory}")
             return 0
         
-        # Process entire directory
-        metadata_list = self.image_processor.process_directory(image_directory)
+        # Stream the directory in batch-sized chunks; writes are deferred and the
+        # metadata file is checkpointed every CHECKPOINT_EVERY_CHUNKS chunks, so an
+        # interrupted run loses at most that many chunks without rewriting the
+        # whole file per chunk
+        metadata_iter = self.image_processor.process_directory_iter(image_directory)
+        batch_size = self.config.batch_size
+        processed_count = 0
+        chunk_count = 0
+        
+        self.metadata_store.begin_bulk()
+        try:
+            while True:
+                metadata_chunk = list(islice(metadata_iter, batch_size))
+                if not metadata_chunk:
+                    break
+                self.metadata_store.save_batch_metadata(metadata_chunk)
+                processed_count += len(metadata_chunk)
+                chunk_count += 1
+                
+                if chunk_count % self.CHECKPOINT_EVERY_CHUNKS == 0:
+                    self.metadata_store.commit_bulk()
+                    self.metadata_store.begin_bulk()
+        finally:
+            self.metadata_store.commit_bulk()
         
-        if metadata_list:
-            self.metadata_store.save_batch_metadata(metadata_list)
-            self.logger.info(f"Reprocessed {len(metadata_list)} images")
-            return len(metadata_list)
+        if processed_count:
+            self.logger.info(f"Reprocessed {processed_count} images")
         
-        return 0
+        return processed_count
     
     def get_processing_status(self) -> dict:
         """
@@ -3,14 +3,22 @@ Query processing system for natural language search against architectural images
 """
 import numpy as np
 import logging
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
 import time
 
+import torch
+
 from src.models.config import AppConfig
 from src.models.search_models import Query, SearchResult
 from src.processors.model_manager import ModelManager
 
+try:
+    import faiss
+except ImportError:
+    # Optional dependency; top-k search falls back to NumPy without it
+    faiss = None
+
 
 class QueryProcessor:
     """
@@ -23,6 +31,12 @@ class QueryProcessor:
     - Query validation and preprocessing
     """
     
+    # Rows per block when scoring large embedding matrices
+    SIMILARITY_TILE_ROWS = 4096
+    
+    # Number of distinct query texts whose embeddings are kept
+    QUERY_CACHE_SIZE = 512
+    
     def __init__(self, config: AppConfig, model_manager: ModelManager):
         """
         Initialize QueryProcessor with configuration and model manager.
@@ -38,6 +52,20 @@ class QueryProcessor:
         # Query processing statistics
         self._query_count = 0
         self._total_processing_time = 0.0
+        
+        # FAISS inner-product index over the last matrix passed to search_top_k
+        self._faiss_index = None
+        self._faiss_matrix: Optional[np.ndarray] = None
+        
+        # Sanitize similarity scores on every query; switched on after a NaN is seen
+        self._strict_sanitize = config.strict_sanitize
+        
+        # Embedding matrix mirrored on the GPU when the model runs on CUDA
+        self._embedding_tensor: Optional[torch.Tensor] = None
+        self._embedding_tensor_source: Optional[np.ndarray] = None
+        
+        # LRU of normalized query text -> text embedding, so repeats skip CLIP
+        self._query_embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
     
     def process_query(self, query_text: str) -> Query:
         """
@@ -52,23 +80,22 @@ class QueryProcessor:
         Raises:
             ValueError: If query is invalid or processing fails
         """
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
             # Validate and normalize query
             normalized_text = self._validate_and_normalize_query(query_text)
             
-            # Generate query embedding using CLIP
-            query_embedding = self.model_manager.generate_text_embedding(normalized_text)
+            # Generate query embedding using CLIP, or reuse it for a repeated query
+            query_embedding = self._encode_text(normalized_text)
             
             # Calculate processing time
-            processing_time = time.time() - start_time
+            processing_time = (time.perf_counter_ns() - start_time) * 1e-9
             
             # Create Query object
             query = Query(
                 text=query_text,
                 embedding=query_embedding,
-                timestamp=datetime.now(),
                 processing_time=processing_time
             )
             
@@ -83,6 +110,36 @@ class QueryProcessor:
             self.logger.error(f"Failed to process query '{query_text}': {e}")
             raise ValueError(f"Query processing failed: {e}")
     
+    def _encode_text(self, normalized_text: str) -> np.ndarray:
+        """
+        Return the CLIP embedding for normalized query text, using the LRU cache.
+        
+        Cached arrays are marked read-only because the same array is handed to
+        every Query built from that text.
+        
+        Args:
+            normalized_text: Query text as returned by _validate_and_normalize_query
+            
+        Returns:
+            np.ndarray: Unit-length text embedding
+        """
+        cache = self._query_embedding_cache
+        embedding = cache.get(normalized_text)
+        if embedding is not None:
+            cache.move_to_end(normalized_text)
+            return embedding
+        
+        embedding = self.model_manager.generate_text_embedding(normalized_text)
+        embedding.flags.writeable = False
+        cache[normalized_text] = embedding
+        if len(cache) > self.QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+        return embedding
+    
+    def clear_query_cache(self):
+        """Drop all cached query embeddings."""
+        self._query_embedding_cache.clear()
+    
     def _validate_and_normalize_query(self, query_text: str) -> str:
         """
         Validate and normalize user query text.
@@ -125,9 +182,29 @@ class QueryProcessor:
         """
         Calculate cosine similarities between query embedding and all image embeddings.
         
+        Kept for API compatibility; delegates to calculate_similarities_vectorized,
+        which skips invalid embeddings individually instead of looping per image.
+        
+        Args:
+            query_embedding: CLIP embedding for the user query
+            image_embeddings: Dictionary mapping image paths to their embeddings
+            
+        Returns:
+            Dict[str, float]: Dictionary mapping image paths to similarity scores
+        """
+        return self.calculate_similarities_vectorized(query_embedding, image_embeddings)
+    
+    def calculate_similarities_vectorized(self, query_embedding: np.ndarray, 
+                                        image_embeddings: Dict[str, np.ndarray],
+                                        normalized: bool = False) -> Dict[str, float]:
+        """
+        Calculate cosine similarities using efficient vectorized operations with enhanced error handling.
+        
         Args:
             query_embedding: CLIP embedding for the user query
             image_embeddings: Dictionary mapping image paths to their embeddings
+            normalized: Whether the image embeddings are already unit-length,
+                in which case the per-row normalization is skipped
             
         Returns:
             Dict[str, float]: Dictionary mapping image paths to similarity scores
@@ -146,189 +223,300 @@ class QueryProcessor:
             return {}
         
         try:
-            similarities = {}
+            image_paths = list(image_embeddings.keys())
+            embedding_matrix = self._stack_embeddings(
+                image_paths, image_embeddings, query_embedding.shape
+            )
             
-            # Normalize query embedding once
-            query_norm = query_embedding / np.linalg.norm(query_embedding)
+            # Drop rows with NaN/inf values (and zero norms) in one vectorized pass
+            valid_mask = np.isfinite(embedding_matrix).all(axis=1)
+            if not normalized:
+                image_norms_values = np.linalg.norm(embedding_matrix, axis=1)
+                valid_mask &= image_norms_values > 0
+            
+            if not valid_mask.all():
+                invalid_count = len(valid_mask) - int(valid_mask.sum())
+                self.logger.warning(f"Skipping {invalid_count} embeddings with NaN, infinite or zero-norm values")
+                image_paths = [path for path, valid in zip(image_paths, valid_mask) if valid]
+                embedding_matrix = embedding_matrix[valid_mask]
+                if not normalized:
+                    image_norms_values = image_norms_values[valid_mask]
+            
+            if not image_paths:
+                self.logger.error("No valid embeddings found for similarity calculation")
+                return {}
             
-            # Calculate similarities for each image
-            for image_path, image_embedding in image_embeddings.items():
-                try:
-                    similarity = self._calculate_cosine_similarity(query_norm, image_embedding)
-                    similarities[image_path] = similarity
-                    
-                except Exception as e:
-                    self.logger.warning(f"Failed to calculate similarity for {image_path}: {e}")
-                    continue
+            # Normalize image embeddings
+            if not normalized:
+                embedding_matrix = embedding_matrix / image_norms_values[:, np.newaxis]
             
-            self.logger.debug(f"Calculated similarities for {len(similarities)} images")
-            return similarities
+            return self.calculate_similarities_matrix(query_embedding, image_paths, embedding_matrix)
             
         except Exception as e:
-            self.logger.error(f"Failed to calculate similarities: {e}")
-            raise ValueError(f"Similarity calculation failed: {e}")
+            self.logger.error(f"Failed to calculate vectorized similarities: {e}")
+            return {}
     
-    def calculate_similarities_vectorized(self, query_embedding: np.ndarray, 
-                                        image_embeddings: Dict[str, np.ndarray]) -> Dict[str, float]:
+    def _stack_embeddings(self, image_paths: List[str], image_embeddings: Dict[str, np.ndarray],
+                          expected_shape: Tuple[int, ...]) -> np.ndarray:
         """
-        Calculate cosine similarities using efficient vectorized operations with enhanced error handling.
+        Stack embeddings into a float32 matrix, dropping entries of the wrong shape.
+        
+        The common case, where every entry is an array of the query's shape, is
+        a single np.stack call; entries are only inspected one by one when that
+        fails. Paths of dropped entries are removed from image_paths in place.
         
         Args:
-            query_embedding: CLIP embedding for the user query
+            image_paths: Paths to stack, in row order
             image_embeddings: Dictionary mapping image paths to their embeddings
+            expected_shape: Shape every embedding must have
+            
+        Returns:
+            np.ndarray: (N, D) float32 matrix lining up with image_paths
+        """
+        try:
+            embedding_matrix = np.stack([image_embeddings[path] for path in image_paths])
+            if embedding_matrix.shape[1:] == expected_shape:
+                return embedding_matrix.astype(np.float32, copy=False)
+        except (ValueError, TypeError):
+            pass
+        
+        valid_paths = []
+        for path in image_paths:
+            embedding = image_embeddings[path]
+            if not isinstance(embedding, np.ndarray) or embedding.size == 0:
+                self.logger.warning(f"Invalid embedding for {path}: not a valid numpy array")
+            elif embedding.shape != expected_shape:
+                self.logger.warning(f"Embedding dimension mismatch for {path}: {embedding.shape} vs {expected_shape}")
+            else:
+                valid_paths.append(path)
+        
+        image_paths[:] = valid_paths
+        if not valid_paths:
+            return np.empty((0,) + tuple(expected_shape), dtype=np.float32)
+        return np.stack([image_embeddings[path] for path in valid_paths]).astype(np.float32, copy=False)
+    
+    def calculate_similarities_matrix(self, query_embedding: np.ndarray,
+                                      image_paths: List[str],
+                                      embedding_matrix: np.ndarray) -> Dict[str, float]:
+        """
+        Calculate cosine similarities against a prebuilt matrix of unit-length embeddings.
+        
+        Unlike calculate_similarities_vectorized, no matrix is assembled per call:
+        the caller keeps the (N, D) matrix, e.g. from
+        MetadataStore.get_all_embeddings_matrix, and the work is one matrix-vector product.
+        
+        Args:
+            query_embedding: CLIP embedding for the user query
+            image_paths: Image paths lining up with the matrix rows
+            embedding_matrix: (N, D) matrix of L2-normalized image embeddings
             
         Returns:
             Dict[str, float]: Dictionary mapping image paths to similarity scores
             
         Raises:
-            ValueError: If embeddings are invalid or calculation fails
+            ValueError: If the query embedding is invalid or does not match the matrix
         """
-        if not isinstance(query_embedding, np.ndarray):
-            raise ValueError("Query embedding must be a numpy array")
-        
-        if len(query_embedding) == 0:
-            raise ValueError("Query embedding cannot be empty")
-        
-        if not image_embeddings:
+        if not image_paths:
             self.logger.warning("No image embeddings provided for similarity calculation")
             return {}
         
-        try:
-            # Filter out invalid embeddings
-            valid_embeddings = {}
-            for path, embedding in image_embeddings.items():
-                if isinstance(embedding, np.ndarray) and embedding.size > 0:
-                    # Check for NaN or infinite values
-                    if not np.isfinite(embedding).all():
-                        self.logger.warning(f"Invalid embedding for {path}: contains NaN or infinite values")
-                        continue
-                    
-                    # Check embedding dimension matches query
-                    if embedding.shape != query_embedding.shape:
-                        self.logger.warning(f"Embedding dimension mismatch for {path}: {embedding.shape} vs {query_embedding.shape}")
-                        continue
-                    
-                    valid_embeddings[path] = embedding
-                else:
-                    self.logger.warning(f"Invalid embedding for {path}: not a valid numpy array")
-            
-            if not valid_embeddings:
-                self.logger.error("No valid embeddings found for similarity calculation")
-                return {}
+        similarities_array = self._score_matrix(query_embedding, embedding_matrix)
+        
+        similarities = dict(zip(image_paths, similarities_array.tolist()))
+        
+        self.logger.debug(f"Calculated matrix similarities for {len(similarities)} images")
+        return similarities
+    
+    def top_k_similarities(self, query_embedding: np.ndarray, image_paths: List[str],
+                           embedding_matrix: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """
+        Return only the k best-scoring images instead of a score for every image.
+        
+        Selection is an O(N) argpartition over the score vector, and Python
+        floats are only created for the k selected entries.
+        
+        Args:
+            query_embedding: CLIP embedding for the user query
+            image_paths: Image paths lining up with the matrix rows
+            embedding_matrix: (N, D) matrix of L2-normalized image embeddings
+            k: Number of results to return
             
-            # Convert embeddings to matrix for vectorized operations
-            image_paths = list(valid_embeddings.keys())
-            
-            try:
-                embedding_matrix = np.array([valid_embeddings[path] for path in image_paths])
-            except Exception as e:
-                self.logger.error(f"Failed to create embedding matrix: {e}")
-                # Fallback to individual processing
-                return self.calculate_similarities(query_embedding, valid_embeddings)
-            
-            # Validate query embedding
-            if not np.isfinite(query_embedding).all():
-                raise ValueError("Query embedding contains NaN or infinite values")
-            
-            # Normalize query embedding with error handling
-            try:
-                query_norm_value = np.linalg.norm(query_embedding)
-                if query_norm_value == 0:
-                    raise ValueError("Query embedding has zero norm")
-                query_norm = query_embedding / query_norm_value
-            except Exception as e:
-                self.logger.error(f"Failed to normalize query embedding: {e}")
-                raise ValueError(f"Query embedding normalization failed: {e}")
-            
-            # Normalize image embeddings with error handling
-            try:
-                image_norms_values = np.linalg.norm(embedding_matrix, axis=1, keepdims=True)
-                
-                # Check for zero norms
-                zero_norm_mask = (image_norms_values == 0).flatten()
-                if zero_norm_mask.any():
-                    self.logger.warning(f"Found {zero_norm_mask.sum()} embeddings with zero norm")
-                    # Set zero norms to 1 to avoid division by zero
-                    image_norms_values[zero_norm_mask] = 1.0
-                
-                image_norms = embedding_matrix / image_norms_values
-                
-            except Exception as e:
-                self.logger.error(f"Failed to normalize image embeddings: {e}")
-                # Fallback to individual processing
-                return self.calculate_similarities(query_embedding, valid_embeddings)
-            
-            # Vectorized cosine similarity calculation
-            try:
-                similarities_array = np.dot(image_norms, query_norm)
-                
-                # Validate results
-                if not np.isfinite(similarities_array).all():
-                    self.logger.warning("Some similarity scores are NaN or infinite")
-                    # Replace invalid values with 0
-                    similarities_array = np.nan_to_num(similarities_array, nan=0.0, posinf=1.0, neginf=-1.0)
-                
-                # Clip to valid range
-                similarities_array = np.clip(similarities_array, -1.0, 1.0)
-                
-            except Exception as e:
-                self.logger.error(f"Failed to calculate similarities: {e}")
-                # Fallback to individual processing
-                return self.calculate_similarities(query_embedding, valid_embeddings)
-            
-            # Create result dictionary
-            similarities = dict(zip(image_paths, similarities_array.tolist()))
-            
-            self.logger.debug(f"Calculated vectorized similarities for {len(similarities)} images")
-            return similarities
+        Returns:
+            List[Tuple[str, float]]: (path, similarity) pairs, most similar first
             
-        except Exception as e:
-            self.logger.error(f"Failed to calculate vectorized similarities: {e}")
-            # Fallback to non-vectorized calculation
-            self.logger.info("Falling back to non-vectorized similarity calculation")
-            try:
-                return self.calculate_similarities(query_embedding, image_embeddings)
-            except Exception as fallback_error:
-                self.logger.error(f"Fallback similarity calculation also failed: {fallback_error}")
-                return {}
+        Raises:
+            ValueError: If the query embedding is invalid or does not match the matrix
+        """
+        if not image_paths or k <= 0:
+            return []
+        
+        scores = self._score_matrix(query_embedding, embedding_matrix)
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(image_paths[i], score) for i, score in zip(top.tolist(), scores[top].tolist())]
     
-    def _calculate_cosine_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+    def _score_matrix(self, query_embedding: np.ndarray, embedding_matrix: np.ndarray) -> np.ndarray:
         """
-        Calculate cosine similarity between two normalized embeddings.
+        Score every row of a unit-length embedding matrix against the query.
         
         Args:
-            embedding1: First embedding (should be normalized)
-            embedding2: Second embedding
+            query_embedding: CLIP embedding for the user query
+            embedding_matrix: (N, D) matrix of L2-normalized image embeddings
             
         Returns:
-            float: Cosine similarity score between -1 and 1
+            np.ndarray: (N,) cosine similarity scores
             
         Raises:
-            ValueError: If embeddings are invalid
+            ValueError: If the query embedding is invalid or does not match the matrix
         """
-        if not isinstance(embedding1, np.ndarray) or not isinstance(embedding2, np.ndarray):
-            raise ValueError("Both embeddings must be numpy arrays")
+        if not isinstance(query_embedding, np.ndarray):
+            raise ValueError("Query embedding must be a numpy array")
         
-        if embedding1.shape != embedding2.shape:
-            raise ValueError(f"Embedding shapes must match: {embedding1.shape} vs {embedding2.shape}")
+        if len(query_embedding) == 0:
+            raise ValueError("Query embedding cannot be empty")
         
-        if len(embedding1) == 0:
-            raise ValueError("Embeddings cannot be empty")
+        if embedding_matrix.ndim != 2 or embedding_matrix.shape[1] != query_embedding.shape[0]:
+            raise ValueError(f"Embedding dimension mismatch: {embedding_matrix.shape} vs {query_embedding.shape}")
         
-        try:
-            # Normalize second embedding
-            embedding2_norm = embedding2 / np.linalg.norm(embedding2)
-            
-            # Calculate dot product (cosine similarity for normalized vectors)
-            similarity = np.dot(embedding1, embedding2_norm)
+        if not np.isfinite(query_embedding).all():
+            raise ValueError("Query embedding contains NaN or infinite values")
+        
+        query_norm_value = float(np.sqrt(np.vdot(query_embedding, query_embedding)))
+        if query_norm_value == 0:
+            raise ValueError("Query embedding has zero norm")
+        # Match the matrix dtype so the product never upcasts the whole matrix
+        query_norm = (query_embedding / query_norm_value).astype(embedding_matrix.dtype, copy=False)
+        
+        similarities_array = None
+        if self._use_gpu():
+            similarities_array = self._similarity_torch(embedding_matrix, query_norm)
+        if similarities_array is None:
+            similarities_array = self._matrix_vector_product(embedding_matrix, query_norm)
+        
+        # Unit vectors keep scores in [-1, 1] up to rounding, so the fast path
+        # only checks for NaN/inf with one reduction (any such value poisons the sum)
+        if not self._strict_sanitize and not np.isfinite(similarities_array.sum()):
+            self.logger.warning("Some similarity scores are NaN or infinite; sanitizing scores from now on")
+            self._strict_sanitize = True
+        
+        if self._strict_sanitize:
+            similarities_array = np.nan_to_num(similarities_array, nan=0.0, posinf=1.0, neginf=-1.0)
+            similarities_array = np.clip(similarities_array, -1.0, 1.0)
+        
+        return similarities_array
+    
+    def search_top_k(self, query_embedding: np.ndarray, image_paths: List[str],
+                     embedding_matrix: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """
+        Find the k most similar images without scoring and sorting the whole corpus in Python.
+        
+        Uses a FAISS IndexFlatIP (exact inner product, SIMD top-k) when faiss is
+        installed, rebuilding it only when a different matrix is passed in;
+        otherwise falls back to top_k_similarities.
+        
+        Args:
+            query_embedding: Query embedding
+            image_paths: Image paths lining up with the matrix rows
+            embedding_matrix: (N, D) matrix of L2-normalized float32 embeddings
+            k: Number of results to return
             
-            # Ensure result is within valid range
-            similarity = np.clip(similarity, -1.0, 1.0)
+        Returns:
+            List[Tuple[str, float]]: (path, similarity) pairs, most similar first
             
-            return float(similarity)
+        Raises:
+            ValueError: If the query embedding is invalid
+        """
+        if not image_paths or k <= 0:
+            return []
+        
+        if faiss is None:
+            return self.top_k_similarities(query_embedding, image_paths, embedding_matrix, k)
+        
+        k = min(k, len(image_paths))
+        query_norm_value = float(np.sqrt(np.vdot(query_embedding, query_embedding)))
+        if query_norm_value == 0 or not np.isfinite(query_norm_value):
+            raise ValueError("Query embedding has zero or invalid norm")
+        query_norm = (query_embedding / query_norm_value).astype(np.float32, copy=False)
+        
+        if self._faiss_matrix is not embedding_matrix:
+            index = faiss.IndexFlatIP(embedding_matrix.shape[1])
+            index.add(np.ascontiguousarray(embedding_matrix, dtype=np.float32))
+            self._faiss_index = index
+            self._faiss_matrix = embedding_matrix
+        scores, indices = self._faiss_index.search(query_norm[np.newaxis, :], k)
+        return [(image_paths[i], float(score))
+                for i, score in zip(indices[0], scores[0]) if i >= 0]
+    
+    def _use_gpu(self) -> bool:
+        """Whether similarity scoring should run on the model's CUDA device."""
+        device = getattr(self.model_manager, 'device', None)
+        return device is not None and torch.device(device).type == 'cuda'
+    
+    def _similarity_torch(self, embedding_matrix: np.ndarray, query_norm: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Score the embedding matrix on the GPU with one matrix-vector product.
+        
+        The matrix is uploaded once and kept on the device until a different
+        matrix is passed in, so each query only transfers the query vector and
+        the scores.
+        
+        Args:
+            embedding_matrix: (N, D) matrix of L2-normalized embeddings
+            query_norm: (D,) unit-length query vector with the matrix dtype
             
+        Returns:
+            Optional[np.ndarray]: (N,) similarity scores, or None if the GPU
+                path failed and the NumPy path should be used instead
+        """
+        device = self.model_manager.device
+        try:
+            if self._embedding_tensor_source is not embedding_matrix:
+                self._embedding_tensor = None
+                self._embedding_tensor = torch.from_numpy(
+                    np.ascontiguousarray(embedding_matrix)
+                ).to(device)
+                self._embedding_tensor_source = embedding_matrix
+            
+            query_tensor = torch.from_numpy(np.ascontiguousarray(query_norm)).to(device)
+            with torch.no_grad():
+                similarities = self._embedding_tensor @ query_tensor
+            return similarities.cpu().numpy()
+        
         except Exception as e:
-            raise ValueError(f"Could not calculate cosine similarity: {e}")
+            self.logger.warning(f"GPU similarity failed, falling back to NumPy: {e}")
+            self._embedding_tensor = None
+            self._embedding_tensor_source = None
+            return None
+    
+    def _matrix_vector_product(self, embedding_matrix: np.ndarray, query_norm: np.ndarray) -> np.ndarray:
+        """
+        Multiply the embedding matrix by the query vector in row tiles.
+        
+        Large matrices are scored in blocks of SIMILARITY_TILE_ROWS rows written
+        straight into one preallocated output, so each block stays cache-resident
+        and no per-block temporaries are allocated.
+        
+        Args:
+            embedding_matrix: (N, D) matrix of embeddings
+            query_norm: (D,) query vector with the same dtype as the matrix
+            
+        Returns:
+            np.ndarray: (N,) array of dot products
+        """
+        tile = self.SIMILARITY_TILE_ROWS
+        num_rows = embedding_matrix.shape[0]
+        
+        if num_rows <= tile or not embedding_matrix.flags['C_CONTIGUOUS']:
+            return embedding_matrix @ query_norm
+        
+        out = np.empty(num_rows, dtype=np.result_type(embedding_matrix, query_norm))
+        for start in range(0, num_rows, tile):
+            np.dot(embedding_matrix[start:start + tile], query_norm, out=out[start:start + tile])
+        return out
     
     def get_processing_stats(self) -> Dict[str, any]:
         """
@@ -275,8 +275,8 @@ class ResultRanker:
             if not result.features:
                 continue
             
-            # Normalize result features
-            normalized_result_features = [f.lower().strip() for f in result.features]
+            # Normalize result features once per result for set membership tests
+            normalized_result_features = {f.lower().strip() for f in result.features}
             
             if match_all:
                 # All required features must be present
@@ -310,24 +310,51 @@ class ResultRanker:
         if len(results) <= 1:
             return results
         
-        diverse_results = [results[0]]  # Always include the top result
+        # Pairwise feature overlap for all results in one matrix pass
+        similarity_matrix = self._feature_similarity_matrix(results)
         
-        for candidate in results[1:]:
-            is_diverse = True
-            
-            # Check similarity with already selected results
-            for selected in diverse_results:
-                # Simple diversity check based on feature overlap
-                if self._calculate_feature_similarity(candidate, selected) > diversity_threshold:
-                    is_diverse = False
-                    break
-            
-            if is_diverse:
-                diverse_results.append(candidate)
+        selected = [0]  # Always include the top result
+        
+        for candidate in range(1, len(results)):
+            # Simple diversity check based on feature overlap with already selected results
+            if not (similarity_matrix[candidate, selected] > diversity_threshold).any():
+                selected.append(candidate)
+        
+        diverse_results = [results[i] for i in selected]
         
         self.logger.debug(f"Applied diversity filter: {len(results)} -> {len(diverse_results)} results")
         return diverse_results
     
+    def _feature_similarity_matrix(self, results: List[SearchResult]) -> np.ndarray:
+        """
+        Calculate pairwise Jaccard similarity of result features.
+        
+        Normalized features are interned to integer ids once, each result
+        becomes a row of a binary incidence matrix, and all intersections come
+        from a single matrix product instead of per-pair set operations.
+        
+        Args:
+            results: List of SearchResult objects
+            
+        Returns:
+            np.ndarray: (n, n) matrix of feature similarity scores (0 to 1)
+        """
+        vocab: Dict[str, int] = {}
+        rows = []
+        for result in results:
+            ids = {vocab.setdefault(f.lower().strip(), len(vocab)) for f in (result.features or ())}
+            rows.append(list(ids))
+        
+        incidence = np.zeros((len(results), max(len(vocab), 1)), dtype=np.float32)
+        for i, ids in enumerate(rows):
+            incidence[i, ids] = 1.0
+        
+        intersection = incidence @ incidence.T
+        sizes = incidence.sum(axis=1)
+        union = sizes[:, None] + sizes[None, :] - intersection
+        
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    
     def _calculate_feature_similarity(self, result1: SearchResult, result2: SearchResult) -> float:
         """
         Calculate similarity between two results based on their features.
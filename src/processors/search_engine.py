@@ -4,9 +4,10 @@ Integrated search engine that combines query processing, metadata storage, and r
 import numpy as np
 import logging
 from typing import List, Dict, Optional, Tuple
+import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import time
-from pathlib import Path
 
 from src.models.config import AppConfig
 from src.models.search_models import Query, SearchResult
@@ -29,6 +30,9 @@ class SearchEngine:
     - Performance optimization and monitoring
     """
     
+    # Ranking strategies whose order follows raw similarity
+    _SIMILARITY_ORDERED_STRATEGIES = ('confidence', 'similarity')
+    
     def __init__(self, config: AppConfig):
         """
         Initialize SearchEngine with configuration.
@@ -47,10 +51,17 @@ class SearchEngine:
         
         # Caching for embeddings and metadata
         self._embedding_cache: Dict[str, np.ndarray] = {}
+        self._embedding_paths: List[str] = []
+        self._embedding_matrix: Optional[np.ndarray] = None
         self._metadata_cache: Dict[str, ImageMetadata] = {}
         self._cache_timestamp: Optional[datetime] = None
         self._cache_ttl = timedelta(minutes=30)  # Cache time-to-live
         
+        # LRU of recent search results, invalidated whenever caches refresh
+        self.enable_result_cache = True
+        self._result_cache: OrderedDict = OrderedDict()
+        self._result_cache_size = 128
+        
         # Search statistics
         self._search_count = 0
         self._total_search_time = 0.0
@@ -81,7 +92,7 @@ class SearchEngine:
         Raises:
             ValueError: If search fails due to invalid input or processing errors
         """
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
         try:
             self.logger.info(f"Starting search for query: '{query_text[:50]}...'")
@@ -96,6 +107,42 @@ class SearchEngine:
             if similarity_threshold is not None and not (0 <= similarity_threshold <= 1):
                 raise ValueError("similarity_threshold must be between 0 and 1")
             
+            # Refresh caches if needed with error handling
+            try:
+                self._refresh_caches_if_needed()
+            except Exception as e:
+                self.logger.warning(f"Cache refresh failed, using existing cache: {e}")
+            
+            # Serve repeated queries from the result cache
+            result_key = (query_text.strip().lower(), max_results, similarity_threshold,
+                          ranking_strategy, apply_diversity_filter)
+            if self.enable_result_cache and result_key in self._result_cache:
+                self._result_cache.move_to_end(result_key)
+                cached_results, cached_query = self._result_cache[result_key]
+                
+                # Image files may have been removed since the results were cached
+                validated_results = [r for r in cached_results if self._validate_search_result(r)]
+                if len(validated_results) != len(cached_results):
+                    self.logger.warning(
+                        f"Dropped {len(cached_results) - len(validated_results)} stale cached results"
+                    )
+                    self._result_cache[result_key] = (tuple(validated_results), cached_query)
+                
+                search_time = (time.perf_counter_ns() - start_time) * 1e-9
+                self._search_count += 1
+                self._total_search_time += search_time
+                
+                # Each call gets its own Query so callers never share or mutate a cached one
+                query = Query(
+                    text=query_text,
+                    embedding=cached_query.embedding,
+                    results_count=len(validated_results),
+                    processing_time=search_time
+                )
+                
+                self.logger.info(f"Search served from result cache: {len(validated_results)} results")
+                return validated_results, query
+            
             # Process the query with error handling
             try:
                 query = self.query_processor.process_query(query_text)
@@ -103,90 +150,85 @@ class SearchEngine:
                 self.logger.error(f"Query processing failed: {e}")
                 raise ValueError(f"Failed to process query: {e}")
             
-            # Refresh caches if needed with error handling
-            try:
-                self._refresh_caches_if_needed()
-            except Exception as e:
-                self.logger.warning(f"Cache refresh failed, using existing cache: {e}")
-            
-            # Get image embeddings with fallback
-            image_embeddings = self._get_cached_embeddings()
+            # Get the cached embedding matrix with fallback
+            image_paths, embedding_matrix = self._get_cached_embedding_matrix()
             
-            if not image_embeddings:
+            if not image_paths:
                 self.logger.warning("No image embeddings available for search")
                 # Return empty results with valid query
                 query.results_count = 0
                 return [], query
             
-            # Calculate similarities with error handling
-            try:
-                similarities = self.query_processor.calculate_similarities_vectorized(
-                    query.embedding, image_embeddings
-                )
-            except Exception as e:
-                self.logger.warning(f"Vectorized similarity calculation failed, falling back: {e}")
-                similarities = self.query_processor.calculate_similarities(
-                    query.embedding, image_embeddings
-                )
-            
-            # Create search results with error handling
-            try:
-                results = self.result_ranker.create_search_results(
-                    similarities, self._metadata_cache
-                )
-            except Exception as e:
-                self.logger.error(f"Failed to create search results: {e}")
-                query.results_count = 0
-                return [], query
+            threshold = similarity_threshold if similarity_threshold is not None else self.config.similarity_threshold
             
-            # Apply threshold filtering with graceful degradation
-            try:
-                threshold = similarity_threshold if similarity_threshold is not None else self.config.similarity_threshold
-                results = self.result_ranker.filter_by_threshold(
-                    results, threshold, 'similarity'
-                )
-            except Exception as e:
-                self.logger.warning(f"Threshold filtering failed, using all results: {e}")
+            # These rankings are monotonic in similarity and truncate to max_results,
+            # so only the best candidates can survive. Start with twice the requested
+            # count so a few dropped candidates are replaced by the next-best ones.
+            fetch_k = None
+            if ranking_strategy in self._SIMILARITY_ORDERED_STRATEGIES:
+                top_k = max_results if max_results is not None else self.config.max_results
+                fetch_k = top_k * 2
             
-            # Rank results with error handling
-            try:
-                results = self.result_ranker.rank_results(
-                    results, max_results, ranking_strategy
+            while True:
+                # Calculate similarities with error handling
+                try:
+                    if fetch_k is not None:
+                        similarities = dict(self.query_processor.top_k_similarities(
+                            query.embedding, image_paths, embedding_matrix, fetch_k
+                        ))
+                    else:
+                        similarities = self.query_processor.calculate_similarities_matrix(
+                            query.embedding, image_paths, embedding_matrix
+                        )
+                except Exception as e:
+                    self.logger.warning(f"Vectorized similarity calculation failed, falling back: {e}")
+                    similarities = self.query_processor.calculate_similarities(
+                        query.embedding, self._embedding_cache
+                    )
+                    fetch_k = None
+                
+                validated_results = self._build_results(
+                    similarities, max_results, threshold, ranking_strategy
                 )
-            except Exception as e:
-                self.logger.warning(f"Result ranking failed, using default order: {e}")
-                if max_results is not None:
-                    results = results[:max_results]
+                if validated_results is None:
+                    query.results_count = 0
+                    return [], query
+                
+                # Candidates lost to missing metadata or missing files are replaced by
+                # fetching a larger top-k, unless every image was scored already or the
+                # weakest candidate is already below the threshold
+                if (fetch_k is None or len(validated_results) >= top_k
+                        or fetch_k >= len(image_paths)
+                        or not similarities or min(similarities.values()) < threshold):
+                    break
+                fetch_k *= 2
             
             # Apply diversity filter if requested
             if apply_diversity_filter:
                 try:
-                    results = self.result_ranker.apply_diversity_filter(results)
+                    validated_results = self.result_ranker.apply_diversity_filter(validated_results)
                 except Exception as e:
                     self.logger.warning(f"Diversity filtering failed, skipping: {e}")
             
-            # Validate results before returning
-            validated_results = []
-            for result in results:
-                if self._validate_search_result(result):
-                    validated_results.append(result)
-                else:
-                    self.logger.warning(f"Invalid result filtered out: {result.image_path}")
-            
             # Update query with results count
             query.results_count = len(validated_results)
             
             # Update statistics
-            search_time = time.time() - start_time
+            search_time = (time.perf_counter_ns() - start_time) * 1e-9
             self._search_count += 1
             self._total_search_time += search_time
             
             self.logger.info(f"Search completed: {len(validated_results)} results in {search_time:.3f}s")
             
+            if self.enable_result_cache:
+                self._result_cache[result_key] = (tuple(validated_results), query)
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
+            
             return validated_results, query
             
         except Exception as e:
-            search_time = time.time() - start_time
+            search_time = (time.perf_counter_ns() - start_time) * 1e-9
             self.logger.error(f"Search failed for query '{query_text}': {e}")
             
             # Create empty query for error case
@@ -194,7 +236,6 @@ class SearchEngine:
                 empty_query = Query(
                     text=query_text,
                     embedding=np.array([]),
-                    timestamp=datetime.now(),
                     results_count=0
                 )
             except:
@@ -206,6 +247,58 @@ class SearchEngine:
             
             raise ValueError(f"Search operation failed: {e}")
     
+    def _build_results(self, similarities: Dict[str, float], max_results: Optional[int],
+                       threshold: float, ranking_strategy: str) -> Optional[List[SearchResult]]:
+        """
+        Turn similarity scores into filtered, ranked and validated search results.
+        
+        Args:
+            similarities: Mapping of image paths to similarity scores
+            max_results: Maximum number of results to return
+            threshold: Minimum similarity for a result to be kept
+            ranking_strategy: Strategy for ranking results
+            
+        Returns:
+            Optional[List[SearchResult]]: Validated results, or None if the
+            results could not be created at all
+        """
+        # Create search results with error handling
+        try:
+            results = self.result_ranker.create_search_results(
+                similarities, self._metadata_cache
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to create search results: {e}")
+            return None
+        
+        # Apply threshold filtering with graceful degradation
+        try:
+            results = self.result_ranker.filter_by_threshold(
+                results, threshold, 'similarity'
+            )
+        except Exception as e:
+            self.logger.warning(f"Threshold filtering failed, using all results: {e}")
+        
+        # Rank the full candidate list; 0 disables the ranker's truncation
+        try:
+            results = self.result_ranker.rank_results(results, 0, ranking_strategy)
+        except Exception as e:
+            self.logger.warning(f"Result ranking failed, using default order: {e}")
+        
+        # Validate in ranked order until enough results are collected, so a
+        # missing file gives its slot to the next-best result
+        limit = max_results if max_results is not None else self.config.max_results
+        validated_results = []
+        for result in results:
+            if len(validated_results) >= limit:
+                break
+            if self._validate_search_result(result):
+                validated_results.append(result)
+            else:
+                self.logger.warning(f"Invalid result filtered out: {result.image_path}")
+        
+        return validated_results
+    
     def _validate_search_result(self, result: SearchResult) -> bool:
         """
         Validate a search result to ensure it's complete and accessible.
@@ -217,8 +310,9 @@ class SearchEngine:
             bool: True if result is valid
         """
         try:
-            # Check if image file exists
-            if not Path(result.image_path).exists():
+            # Check if image file exists; one stat per result keeps the cost
+            # proportional to the number of results, not the directory size
+            if not os.path.isfile(result.image_path):
                 return False
             
             # Check if confidence score is valid
@@ -263,20 +357,26 @@ class SearchEngine:
             metadata_dict = self.metadata_store.load_all_metadata()
             
             # Extract embeddings and update caches
-            embedding_cache = {}
             metadata_cache = {}
             
             for path, metadata in metadata_dict.items():
                 if metadata.embedding is not None:
-                    embedding_cache[path] = metadata.embedding
                     metadata_cache[path] = metadata
                 else:
                     self.logger.warning(f"No embedding found for {path}")
             
+            # Unit-normalized rows from the store's stacked matrix, kept whole
+            # for the query path and as per-path row views for lookups
+            embedding_paths, embedding_matrix = self.metadata_store.get_all_embeddings_matrix()
+            embedding_cache = dict(zip(embedding_paths, embedding_matrix))
+            
             # Update caches atomically
             self._embedding_cache = embedding_cache
+            self._embedding_paths = embedding_paths
+            self._embedding_matrix = embedding_matrix
             self._metadata_cache = metadata_cache
             self._cache_timestamp = datetime.now()
+            self._result_cache.clear()
             
             self.logger.info(f"Refreshed caches: {len(self._embedding_cache)} embeddings, "
                            f"{len(self._metadata_cache)} metadata entries")
@@ -285,21 +385,21 @@ class SearchEngine:
             self.logger.error(f"Failed to refresh caches: {e}")
             # Keep existing caches on error
     
-    def _get_cached_embeddings(self) -> Dict[str, np.ndarray]:
+    def _get_cached_embedding_matrix(self) -> Tuple[List[str], np.ndarray]:
         """
-        Get embeddings from cache with hit/miss tracking.
+        Get the cached embedding matrix with hit/miss tracking.
         
         Returns:
-            Dict[str, np.ndarray]: Dictionary of cached embeddings
+            Tuple[List[str], np.ndarray]: Image paths and their unit-normalized
+            (N, D) embedding matrix; the matrix is shared, not copied
         """
-        if self._embedding_cache:
+        if self._embedding_paths:
             self._cache_hits += 1
-            return self._embedding_cache.copy()
         else:
             self._cache_misses += 1
             self.logger.warning("Embedding cache miss - refreshing caches")
             self._refresh_caches()
-            return self._embedding_cache.copy()
+        return self._embedding_paths, self._embedding_matrix
     
     def search_by_features(self, features: List[str], 
                           match_all: bool = False,
@@ -321,13 +421,15 @@ class SearchEngine:
             # Create dummy results with high confidence for feature matches
             results = []
             
+            # Normalize search features once per query, not once per image
+            normalized_search_features = [f.lower().strip() for f in features]
+            
             for path, metadata in self._metadata_cache.items():
                 if not metadata.features:
                     continue
                 
                 # Check feature matching
-                normalized_metadata_features = [f.lower().strip() for f in metadata.features]
-                normalized_search_features = [f.lower().strip() for f in features]
+                normalized_metadata_features = {f.lower().strip() for f in metadata.features}
                 
                 matches = [f for f in normalized_search_features if f in normalized_metadata_features]
                 
@@ -384,17 +486,16 @@ class SearchEngine:
             
             reference_embedding = self._embedding_cache[image_path]
             
-            # Calculate similarities with all other images
-            similarities = {}
-            for path, embedding in self._embedding_cache.items():
-                if exclude_self and path == image_path:
-                    continue
-                
-                similarity = self.query_processor._calculate_cosine_similarity(
-                    reference_embedding / np.linalg.norm(reference_embedding),
-                    embedding
-                )
-                similarities[path] = similarity
+            # Only the top matches are needed, plus one slot for the reference itself
+            if max_results is None:
+                max_results = self.config.max_results
+            top_matches = self.query_processor.search_top_k(
+                reference_embedding, self._embedding_paths, self._embedding_matrix,
+                max_results + 1 if exclude_self else max_results
+            )
+            similarities = dict(top_matches)
+            if exclude_self:
+                similarities.pop(image_path, None)
             
             # Create and rank results
             results = self.result_ranker.create_search_results(similarities, self._metadata_cache)
@@ -407,6 +508,32 @@ class SearchEngine:
             self.logger.error(f"Similar image search failed: {e}")
             return []
     
+    def warmup(self, query_text: str = "architectural building") -> bool:
+        """
+        Run one untimed query through the text encoder and similarity path.
+        
+        The first forward pass pays for lazy initialization (kernel selection,
+        allocator growth), so running it here keeps that cost out of the first
+        measured search and out of the search statistics.
+        
+        Args:
+            query_text: Text used for the warmup query
+            
+        Returns:
+            bool: True if warmup completed successfully
+        """
+        try:
+            query_embedding = self.model_manager.generate_text_embedding(query_text)
+            if self._embedding_paths:
+                self.query_processor.calculate_similarities_matrix(
+                    query_embedding, self._embedding_paths, self._embedding_matrix
+                )
+            self.logger.debug("Search engine warmup completed")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Search engine warmup failed: {e}")
+            return False
+    
     def validate_search_readiness(self) -> Dict[str, any]:
         """
         Validate that the search engine is ready for operations.
@@ -464,8 +591,11 @@ class SearchEngine:
     def clear_caches(self):
         """Clear all caches and force refresh on next access."""
         self._embedding_cache.clear()
+        self._embedding_paths = []
+        self._embedding_matrix = None
         self._metadata_cache.clear()
         self._cache_timestamp = None
+        self._result_cache.clear()
         self.logger.info("Search caches cleared")
     
     def get_search_statistics(self) -> Dict[str, any]:
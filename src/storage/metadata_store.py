@@ -2,30 +2,51 @@
 Metadata storage system for efficient persistence and retrieval of image embeddings and descriptions.
 """
 import json
+import pickle
 import logging
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Set
-from datetime import datetime
+from typing import List, Dict, Optional, Union, Set, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import hashlib
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from src.models.config import AppConfig
-from src.models.image_metadata import ImageMetadata
+from src.models.image_metadata import ImageMetadata, quantize_embedding, dequantize_embedding
+
+
+# First byte of any pickle written with protocol 2 or newer (the PROTO opcode)
+PICKLE_MAGIC = b'\x80'
 
 
 class MetadataStore:
     """
-    Manages JSON-based persistence of image metadata with efficient storage and retrieval.
+    Manages pickle/JSON persistence of image metadata with efficient storage and retrieval.
     
     This class handles:
-    - JSON-based metadata storage and loading
+    - Pickle-based metadata storage and loading, with JSON kept for export
     - Efficient embedding storage and retrieval
     - Incremental processing to handle new images
     - Data integrity and validation
     - Backup and recovery functionality
     """
     
+    # Image extensions picked up when scanning for new images (matched case-insensitively)
+    SUPPORTED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'})
+    
     def __init__(self, config: AppConfig):
         """
         Initialize MetadataStore with configuration.
@@ -35,13 +56,41 @@ class MetadataStore:
         """
         self.config = config
         self.metadata_file = Path(config.metadata_file)
+        if config.metadata_format == 'pickle' and self.metadata_file.suffix == '.json':
+            # Never write binary pickle under a .json name
+            self.metadata_file = self.metadata_file.with_suffix('.pkl')
         self.logger = logging.getLogger(__name__)
         
+        if config.compress_embeddings and zstandard is None:
+            self.logger.warning("zstandard is not installed; embeddings will be written uncompressed")
+        
         # In-memory cache for loaded metadata
         self._metadata_cache: Dict[str, ImageMetadata] = {}
         self._cache_loaded = False
         self._last_modified = None
         
+        # Generation counter, bumped whenever the metadata cache changes
+        self._gen = 0
+        
+        # Small LRU of path lookups keyed by (generation, path)
+        self._lookup_cache: "OrderedDict[Tuple[int, str], Optional[ImageMetadata]]" = OrderedDict()
+        self._lookup_cache_size = 10_000
+        
+        # Stacked embedding matrix, rebuilt lazily after the cache changes
+        self._paths_vec: List[str] = []
+        self._embeddings_mat: Optional[np.ndarray] = None
+        self._embeddings_gen = -1
+        
+        # Bulk mode defers file rewrites until commit_bulk()
+        self._bulk_depth = 0
+        self._bulk_dirty = False
+        
+        # Periodic snapshot policy; the atomic temp-file rename already gives crash safety
+        self._snapshot_every_saves = 20
+        self._snapshot_interval = timedelta(minutes=30)
+        self._saves_since_snapshot = 0
+        self._last_snapshot_time = datetime.now()
+        
         # Ensure storage directory exists
         self._ensure_storage_directory()
     
@@ -49,6 +98,35 @@ class MetadataStore:
         """Create storage directory if it doesn't exist."""
         self.metadata_file.parent.mkdir(parents=True, exist_ok=True)
     
+    @staticmethod
+    def _path_key(image_path: Union[str, Path]) -> str:
+        """
+        Convert an image path to its cache key without re-formatting strings.
+        
+        Args:
+            image_path: Path to the image
+            
+        Returns:
+            str: Path string used as the metadata cache key
+        """
+        return image_path if isinstance(image_path, str) else os.fspath(image_path)
+    
+    @staticmethod
+    def _normalize_embedding(embedding: np.ndarray) -> np.ndarray:
+        """
+        Scale an embedding to unit L2 norm so similarity reduces to a dot product.
+        
+        Args:
+            embedding: Embedding vector
+            
+        Returns:
+            np.ndarray: Unit-length float32 copy of the embedding, or the
+            embedding unchanged if its norm is zero
+        """
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.sqrt(np.vdot(embedding, embedding)))
+        return embedding / norm if norm > 0 else embedding
+    
     def _get_file_hash(self, file_path: Union[str, Path]) -> str:
         """
         Generate hash for file to detect changes.
@@ -73,9 +151,41 @@ class MetadataStore:
             self.logger.warning(f"Failed to generate hash for {file_path}: {e}")
             return ""
     
+    def _read_metadata_payload(self, file_path: Path) -> dict:
+        """
+        Read a raw metadata payload, sniffing whether it was written as pickle or JSON.
+        
+        Args:
+            file_path: Path to the metadata file
+            
+        Returns:
+            dict: Payload containing an 'images' entry
+            
+        Raises:
+            ValueError: If file format is invalid
+        """
+        with open(file_path, 'rb') as f:
+            if f.read(1) == PICKLE_MAGIC:
+                # Only unpickle when this store is configured to write pickle itself
+                if self.config.metadata_format != 'pickle':
+                    raise ValueError(f"Refusing to unpickle unexpected file: {file_path}")
+                f.seek(0)
+                data = pickle.load(f)
+            else:
+                f.seek(0)
+                raw = f.read()
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
+        
+        # Validate file format
+        if not isinstance(data, dict) or 'images' not in data:
+            raise ValueError("Invalid metadata file format")
+        
+        return data
+    
     def _load_metadata_from_file(self) -> Dict[str, ImageMetadata]:
         """
-        Load metadata from JSON file.
+        Load metadata from pickle or JSON file.
         
         Returns:
             Dict[str, ImageMetadata]: Dictionary mapping image paths to metadata
@@ -88,22 +198,34 @@ class MetadataStore:
             return {}
         
         try:
-            with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Validate file format
-            if not isinstance(data, dict) or 'images' not in data:
-                raise ValueError("Invalid metadata file format")
+            data = self._read_metadata_payload(self.metadata_file)
             
             metadata_dict = {}
             
-            for item in data['images']:
-                try:
-                    metadata = ImageMetadata.from_dict(item)
-                    metadata_dict[metadata.path] = metadata
-                except Exception as e:
-                    self.logger.warning(f"Failed to load metadata item: {e}")
-                    continue
+            if isinstance(data['images'], dict):
+                # Pickle payload already holds ImageMetadata objects
+                scales = data.get('embedding_scales', {})
+                for path, metadata in data['images'].items():
+                    if path in scales:
+                        metadata.embedding = dequantize_embedding(metadata.embedding, scales[path])
+                    elif metadata.embedding.dtype != np.float32:
+                        metadata.embedding = metadata.embedding.astype(np.float32)
+                    metadata_dict[path] = metadata
+            else:
+                # Without zstandard every compressed item would fail below and be
+                # skipped, which would look like an empty store
+                if zstandard is None and any('embedding_z' in item for item in data['images']):
+                    raise ValueError(
+                        f"{self.metadata_file} stores zstd-compressed embeddings; "
+                        "install the zstandard package to load it"
+                    )
+                for item in data['images']:
+                    try:
+                        metadata = ImageMetadata.from_dict(item)
+                        metadata_dict[metadata.path] = metadata
+                    except Exception as e:
+                        self.logger.warning(f"Failed to load metadata item: {e}")
+                        continue
             
             self.logger.info(f"Loaded {len(metadata_dict)} metadata entries from {self.metadata_file}")
             return metadata_dict
@@ -111,13 +233,96 @@ class MetadataStore:
         except json.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON in metadata file: {e}")
             raise ValueError(f"Corrupted metadata file: {e}")
+        except pickle.UnpicklingError as e:
+            self.logger.error(f"Invalid pickle in metadata file: {e}")
+            raise ValueError(f"Corrupted metadata file: {e}")
         except Exception as e:
             self.logger.error(f"Failed to load metadata file: {e}")
             raise ValueError(f"Could not load metadata: {e}")
     
+    def _write_metadata_payload(self, metadata_dict: Dict[str, ImageMetadata],
+                                file_path: Path, metadata_format: str,
+                                pretty: bool = False):
+        """
+        Write metadata to a file in the given format.
+        
+        Args:
+            metadata_dict: Dictionary of metadata to write
+            file_path: Destination file
+            metadata_format: 'pickle' or 'json'
+            pretty: Whether to indent JSON output
+        """
+        embedding_dtype = self.config.embedding_dtype
+        header = {
+            'version': '1.0',
+            'created': datetime.now().isoformat(),
+            'total_images': len(metadata_dict)
+        }
+        
+        if metadata_format == 'pickle':
+            # Protocol 5 byte-dumps numpy buffers instead of listifying them
+            if embedding_dtype == 'int8':
+                images = {}
+                scales = {}
+                for path, metadata in metadata_dict.items():
+                    codes, scales[path] = quantize_embedding(metadata.embedding)
+                    images[path] = replace(metadata, embedding=codes)
+                data = dict(header, images=images, embedding_scales=scales)
+            else:
+                data = dict(header, images={
+                    path: replace(metadata, embedding=metadata.embedding.astype(embedding_dtype, copy=False))
+                    for path, metadata in metadata_dict.items()
+                })
+            with open(file_path, 'wb') as f:
+                pickle.dump(data, f, protocol=5)
+        else:
+            compress = self.config.compress_embeddings and not pretty and zstandard is not None
+            data = dict(header, images=[
+                metadata.to_dict(embedding_dtype, compress) for metadata in metadata_dict.values()
+            ])
+            if orjson is not None:
+                # C encoder writes UTF-8 bytes directly, no per-element callbacks
+                with open(file_path, 'wb') as f:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+                return
+            
+            with open(file_path, 'w', encoding='utf-8') as f:
+                if pretty:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                else:
+                    # Compact output roughly halves bytes written and encoder work
+                    json.dump(data, f, separators=(',', ':'), ensure_ascii=True)
+    
+    def begin_bulk(self):
+        """
+        Start deferring file rewrites so several saves share one write.
+        
+        Saves made until the matching commit_bulk() only update the in-memory
+        cache. Calls may be nested; the file is written when the outermost
+        bulk section is committed.
+        """
+        self._bulk_depth += 1
+    
+    def commit_bulk(self):
+        """
+        End a bulk section started by begin_bulk(), writing pending changes once.
+        
+        Raises:
+            ValueError: If saving fails
+        """
+        if self._bulk_depth == 0:
+            return
+        
+        self._bulk_depth -= 1
+        if self._bulk_depth == 0 and self._bulk_dirty:
+            self._bulk_dirty = False
+            self._save_metadata_to_file(self._metadata_cache)
+    
     def _save_metadata_to_file(self, metadata_dict: Dict[str, ImageMetadata]):
         """
-        Save metadata dictionary to JSON file.
+        Save metadata dictionary to file in the configured format.
+        
+        Inside a bulk section the write is deferred until commit_bulk().
         
         Args:
             metadata_dict: Dictionary of metadata to save
@@ -125,39 +330,51 @@ class MetadataStore:
         Raises:
             ValueError: If saving fails
         """
+        if self._bulk_depth > 0:
+            self._bulk_dirty = True
+            return
+        
         try:
-            # Create backup if file exists
-            if self.metadata_file.exists():
-                backup_path = self.metadata_file.with_suffix('.json.backup')
-                self.metadata_file.replace(backup_path)
-                self.logger.debug(f"Created backup: {backup_path}")
-            
-            # Prepare data for JSON serialization
-            data = {
-                'version': '1.0',
-                'created': datetime.now().isoformat(),
-                'total_images': len(metadata_dict),
-                'images': [metadata.to_dict() for metadata in metadata_dict.values()]
-            }
-            
             # Write to temporary file first, then rename for atomic operation
-            temp_file = self.metadata_file.with_suffix('.json.tmp')
+            temp_file = self.metadata_file.with_suffix(self.metadata_file.suffix + '.tmp')
             
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self._write_metadata_payload(
+                metadata_dict, temp_file, self.config.metadata_format, self.config.pretty_json
+            )
             
             # Atomic rename
-            temp_file.replace(self.metadata_file)
+            os.replace(temp_file, self.metadata_file)
+            
+            # The cache already holds what was just written; don't reparse it on the next save
+            self._last_modified = self.metadata_file.stat().st_mtime
             
             self.logger.info(f"Saved {len(metadata_dict)} metadata entries to {self.metadata_file}")
             
         except Exception as e:
             self.logger.error(f"Failed to save metadata file: {e}")
             # Clean up temporary file if it exists
-            temp_file = self.metadata_file.with_suffix('.json.tmp')
+            temp_file = self.metadata_file.with_suffix(self.metadata_file.suffix + '.tmp')
             if temp_file.exists():
                 temp_file.unlink()
             raise ValueError(f"Could not save metadata: {e}")
+        
+        self._snapshot_if_due()
+    
+    def _snapshot_if_due(self):
+        """Copy the metadata file to its backup path every N saves or every T minutes."""
+        self._saves_since_snapshot += 1
+        
+        if (self._saves_since_snapshot < self._snapshot_every_saves and
+                datetime.now() - self._last_snapshot_time < self._snapshot_interval):
+            return
+        
+        try:
+            self.create_backup(self.metadata_file.with_suffix(self.metadata_file.suffix + '.backup'))
+            self._saves_since_snapshot = 0
+            self._last_snapshot_time = datetime.now()
+        except ValueError as e:
+            # A missed snapshot must not fail the save that triggered it
+            self.logger.warning(f"Periodic snapshot skipped: {e}")
     
     def _refresh_cache_if_needed(self):
         """Refresh cache if metadata file has been modified."""
@@ -165,6 +382,7 @@ class MetadataStore:
             if self._cache_loaded:
                 self._metadata_cache.clear()
                 self._cache_loaded = False
+                self._gen += 1
             return
         
         try:
@@ -174,8 +392,12 @@ class MetadataStore:
                 self._metadata_cache = self._load_metadata_from_file()
                 self._cache_loaded = True
                 self._last_modified = current_modified
+                self._gen += 1
                 self.logger.debug("Metadata cache refreshed")
-                
+        
+        except ValueError:
+            # An unreadable metadata file must not be mistaken for an empty store
+            raise
         except Exception as e:
             self.logger.warning(f"Failed to refresh cache: {e}")
     
@@ -198,8 +420,12 @@ class MetadataStore:
         """
         self._refresh_cache_if_needed()
         
+        # Store a unit-normalized copy so queries can skip per-row norms
+        metadata = replace(metadata, embedding=self._normalize_embedding(metadata.embedding))
+        
         # Update cache
         self._metadata_cache[metadata.path] = metadata
+        self._gen += 1
         
         # Save to file
         self._save_metadata_to_file(self._metadata_cache)
@@ -218,15 +444,47 @@ class MetadataStore:
         
         self._refresh_cache_if_needed()
         
-        # Update cache with all new metadata
+        # Update cache with unit-normalized copies of all new metadata
         for metadata in metadata_list:
-            self._metadata_cache[metadata.path] = metadata
+            self._metadata_cache[metadata.path] = replace(
+                metadata, embedding=self._normalize_embedding(metadata.embedding)
+            )
+        self._gen += 1
         
         # Save to file once
         self._save_metadata_to_file(self._metadata_cache)
         
         self.logger.info(f"Saved batch of {len(metadata_list)} metadata entries")
     
+    def _lookup(self, image_path: Union[str, Path]) -> Optional[ImageMetadata]:
+        """
+        Look up metadata through the generation-keyed LRU.
+        
+        Hits skip the file-modification check entirely; entries from older
+        generations are never matched and age out of the LRU.
+        
+        Args:
+            image_path: Path to the image
+            
+        Returns:
+            Optional[ImageMetadata]: Metadata if found, None otherwise
+        """
+        key = self._path_key(image_path)
+        
+        lookup_key = (self._gen, key)
+        if lookup_key in self._lookup_cache:
+            self._lookup_cache.move_to_end(lookup_key)
+            return self._lookup_cache[lookup_key]
+        
+        self._refresh_cache_if_needed()
+        metadata = self._metadata_cache.get(key)
+        
+        self._lookup_cache[(self._gen, key)] = metadata
+        if len(self._lookup_cache) > self._lookup_cache_size:
+            self._lookup_cache.popitem(last=False)
+        
+        return metadata
+    
     def get_metadata(self, image_path: Union[str, Path]) -> Optional[ImageMetadata]:
         """
         Get metadata for a specific image.
@@ -237,8 +495,7 @@ class MetadataStore:
         Returns:
             Optional[ImageMetadata]: Metadata if found, None otherwise
         """
-        self._refresh_cache_if_needed()
-        return self._metadata_cache.get(str(image_path))
+        return self._lookup(image_path)
     
     def has_metadata(self, image_path: Union[str, Path]) -> bool:
         """
@@ -250,8 +507,7 @@ class MetadataStore:
         Returns:
             bool: True if metadata exists
         """
-        self._refresh_cache_if_needed()
-        return str(image_path) in self._metadata_cache
+        return self._lookup(image_path) is not None
     
     def remove_metadata(self, image_path: Union[str, Path]):
         """
@@ -262,9 +518,10 @@ class MetadataStore:
         """
         self._refresh_cache_if_needed()
         
-        image_path_str = str(image_path)
+        image_path_str = self._path_key(image_path)
         if image_path_str in self._metadata_cache:
             del self._metadata_cache[image_path_str]
+            self._gen += 1
             self._save_metadata_to_file(self._metadata_cache)
             self.logger.info(f"Removed metadata for {image_path}")
         else:
@@ -288,53 +545,138 @@ class MetadataStore:
         
         self._refresh_cache_if_needed()
         
-        # Supported image extensions
-        supported_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
+        image_files = self._scan_image_files(image_directory)
+        
+        # New images need no stat; only already-processed ones are checked for
+        # changes, and those stat calls are I/O bound, so overlap them
+        known_files = []
+        images_to_process = []
+        for image_path, entry in image_files:
+            if os.fspath(image_path) in self._metadata_cache:
+                known_files.append((image_path, entry))
+            else:
+                images_to_process.append(image_path)
+        
+        if known_files:
+            max_workers = min(32, (os.cpu_count() or 1) * 4, len(known_files))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                needs_processing = executor.map(lambda item: self._needs_processing(*item), known_files)
+                images_to_process.extend(
+                    image_path for (image_path, _), needed in zip(known_files, needs_processing) if needed
+                )
         
-        # Find all image files
+        self.logger.info(f"Found {len(images_to_process)} images needing processing out of {len(image_files)} total")
+        return images_to_process
+    
+    def _scan_image_files(self, image_directory: Path) -> List[Tuple[Path, os.DirEntry]]:
+        """
+        Collect supported image files under a directory with os.scandir.
+        
+        One traversal matches extensions case-insensitively, instead of an
+        rglob pass per extension and case, and keeps each DirEntry so its
+        stat result can be reused.
+        
+        Args:
+            image_directory: Directory to scan recursively
+            
+        Returns:
+            List[Tuple[Path, os.DirEntry]]: Image paths with their directory entries
+        """
         image_files = []
-        for ext in supported_extensions:
-            image_files.extend(image_directory.rglob(f"*{ext}"))
-            image_files.extend(image_directory.rglob(f"*{ext.upper()}"))
+        pending = [os.fspath(image_directory)]
         
-        # Remove duplicates
-        image_files = list(set(image_files))
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in self.SUPPORTED_EXTENSIONS:
+                            image_files.append((Path(entry.path), entry))
+            except OSError as e:
+                self.logger.warning(f"Cannot scan directory {current}: {e}")
+        
+        return image_files
+    
+    def _needs_processing(self, image_path: Path, entry: Optional[os.DirEntry] = None) -> bool:
+        """
+        Check whether a single image is new or modified since it was last processed.
         
-        # Check which images need processing
-        images_to_process = []
+        Args:
+            image_path: Path to the image
+            entry: Directory entry for the image from a scan, whose stat is reused
+            
+        Returns:
+            bool: True if the image should be (re)processed
+        """
+        metadata = self._metadata_cache.get(os.fspath(image_path))
         
-        for image_path in image_files:
-            image_path_str = str(image_path)
+        # Check if metadata exists
+        if metadata is None:
+            return True
+        
+        # Check if image has been modified since processing
+        try:
+            image_stat = entry.stat() if entry is not None else image_path.stat()
             
-            # Check if metadata exists
-            if image_path_str not in self._metadata_cache:
-                images_to_process.append(image_path)
-                continue
+            # Compare modification times
+            if metadata.processed_date:
+                image_modified = datetime.fromtimestamp(image_stat.st_mtime)
+                if image_modified > metadata.processed_date:
+                    return True
             
-            # Check if image has been modified since processing
-            try:
-                metadata = self._metadata_cache[image_path_str]
-                image_stat = image_path.stat()
-                
-                # Compare modification times
-                if metadata.processed_date:
-                    image_modified = datetime.fromtimestamp(image_stat.st_mtime)
-                    if image_modified > metadata.processed_date:
-                        images_to_process.append(image_path)
-                        continue
-                
-                # Check if file size changed
-                if metadata.file_size and metadata.file_size != image_stat.st_size:
-                    images_to_process.append(image_path)
-                    continue
-                    
-            except Exception as e:
-                self.logger.warning(f"Failed to check modification for {image_path}: {e}")
-                # Include in processing if we can't determine status
-                images_to_process.append(image_path)
+            # Check if file size changed
+            if metadata.file_size and metadata.file_size != image_stat.st_size:
+                return True
+            
+            return False
+            
+        except Exception as e:
+            self.logger.warning(f"Failed to check modification for {image_path}: {e}")
+            # Include in processing if we can't determine status
+            return True
+    
+    def get_all_embeddings_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Get all embeddings stacked into a single matrix for vectorized similarity search.
         
-        self.logger.info(f"Found {len(images_to_process)} images needing processing out of {len(image_files)} total")
-        return images_to_process
+        Rows are L2-normalized once per cache generation (zero vectors are left
+        as-is), so cosine similarity against a unit query is a plain dot product.
+        Embeddings whose shape differs from the first one are skipped.
+        
+        Returns:
+            Tuple[List[str], np.ndarray]: Image paths and an (N, D) embedding matrix
+            whose rows line up with the paths
+        """
+        self._refresh_cache_if_needed()
+        
+        if self._embeddings_gen != self._gen or self._embeddings_mat is None:
+            paths = []
+            embeddings = []
+            for path, metadata in self._metadata_cache.items():
+                if metadata.embedding is None:
+                    continue
+                if embeddings and metadata.embedding.shape != embeddings[0].shape:
+                    self.logger.warning(f"Embedding dimension mismatch for {path}: "
+                                        f"{metadata.embedding.shape} vs {embeddings[0].shape}")
+                    continue
+                paths.append(path)
+                embeddings.append(metadata.embedding)
+            
+            if paths:
+                # float32 halves the bandwidth of a float64 matrix on the memory-bound query path
+                matrix = np.stack(embeddings).astype(np.float32, copy=False)
+                norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+                norms[norms == 0] = 1.0
+                self._embeddings_mat = np.ascontiguousarray(matrix / norms[:, np.newaxis])
+            else:
+                self._embeddings_mat = np.empty((0, 0), dtype=np.float32)
+            
+            self._paths_vec = paths
+            self._embeddings_gen = self._gen
+        
+        return self._paths_vec, self._embeddings_mat
     
     def get_all_embeddings(self) -> Dict[str, np.ndarray]:
         """
@@ -343,14 +685,8 @@ class MetadataStore:
         Returns:
             Dict[str, np.ndarray]: Dictionary mapping image paths to embeddings
         """
-        self._refresh_cache_if_needed()
-        
-        embeddings = {}
-        for path, metadata in self._metadata_cache.items():
-            if metadata.embedding is not None:
-                embeddings[path] = metadata.embedding
-        
-        return embeddings
+        paths, matrix = self.get_all_embeddings_matrix()
+        return dict(zip(paths, matrix))
     
     def get_storage_stats(self) -> Dict[str, any]:
         """
@@ -426,6 +762,7 @@ class MetadataStore:
             del self._metadata_cache[path]
         
         if orphaned_paths:
+            self._gen += 1
             self._save_metadata_to_file(self._metadata_cache)
             self.logger.info(f"Removed {len(orphaned_paths)} orphaned metadata entries")
         
@@ -449,7 +786,9 @@ class MetadataStore:
         
         if backup_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.metadata_file.with_name(f"{self.metadata_file.stem}_{timestamp}.json")
+            backup_path = self.metadata_file.with_name(
+                f"{self.metadata_file.stem}_{timestamp}{self.metadata_file.suffix}"
+            )
         else:
             backup_path = Path(backup_path)
         
@@ -484,15 +823,11 @@ class MetadataStore:
         
         try:
             # Validate backup file
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if not isinstance(data, dict) or 'images' not in data:
-                raise ValueError("Invalid backup file format")
+            self._read_metadata_payload(backup_path)
             
             # Create backup of current file if it exists
             if self.metadata_file.exists():
-                current_backup = self.metadata_file.with_suffix('.json.pre_restore')
+                current_backup = self.metadata_file.with_suffix(self.metadata_file.suffix + '.pre_restore')
                 self.metadata_file.replace(current_backup)
                 self.logger.info(f"Current file backed up to: {current_backup}")
             
@@ -503,9 +838,37 @@ class MetadataStore:
             # Clear cache to force reload
             self._metadata_cache.clear()
             self._cache_loaded = False
+            self._gen += 1
             
             self.logger.info(f"Restored metadata from backup: {backup_path}")
             
         except Exception as e:
             self.logger.error(f"Failed to restore from backup: {e}")
-            raise ValueError(f"Restore failed: {e}")
\ No newline at end of file
+            raise ValueError(f"Restore failed: {e}")
+    
+    def export_to_json(self, export_path: Union[str, Path]) -> Path:
+        """
+        Export all metadata as human-readable JSON, regardless of the internal format.
+        
+        Args:
+            export_path: Path to write the JSON export to
+            
+        Returns:
+            Path: Path to the exported file
+            
+        Raises:
+            ValueError: If export fails
+        """
+        export_path = Path(export_path)
+        self._refresh_cache_if_needed()
+        
+        try:
+            export_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_metadata_payload(self._metadata_cache, export_path, 'json', pretty=True)
+            
+            self.logger.info(f"Exported {len(self._metadata_cache)} metadata entries to {export_path}")
+            return export_path
+            
+        except Exception as e:
+            self.logger.error(f"Failed to export metadata: {e}")
+            raise ValueError(f"Export failed: {e}")
\ No newline at end of file
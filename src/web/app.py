@@ -1,13 +1,17 @@
 """
 Main Streamlit web application for AI Architectural Search System.
 """
+import os
+
+# Defer CUDA kernel loading until first use; this must run before anything
+# imports torch, so it sits above every other import
+os.environ.setdefault('CUDA_MODULE_LOADING', 'LAZY')
+
 import streamlit as st
 import logging
-from pathlib import Path
 import sys
-import os
 import time
-import psutil
+from concurrent.futures import ThreadPoolExecutor
 import torch
 
 # Add src directory to path for imports
@@ -24,13 +28,30 @@ from src.web.components import (
 )
 from src.web.search import render_search_interface
 from src.web.results import handle_results_display
-from src.web.cache import initialize_performance_optimizations, render_performance_metrics
+from src.web.cache import (
+    initialize_performance_optimizations, render_performance_metrics,
+    preload_common_queries, get_memory_snapshot, get_disk_snapshot
+)
 from src.web.error_handler import ErrorHandler, render_system_health, with_error_handling
 
 
+@st.cache_resource
+def get_app_config():
+    """
+    Load and validate the configuration once per process.
+    
+    The configuration comes from the environment, which does not change
+    while the server runs, so reruns reuse the same instance.
+    
+    Returns:
+        Validated AppConfig
+    """
+    return get_config()
+
+
 def setup_page_config():
     """Configure Streamlit page settings."""
-    config = get_config()
+    config = get_app_config()
     
     st.set_page_config(
         page_title=config.page_title,
@@ -41,6 +62,51 @@ def setup_page_config():
     
     # Load custom CSS styles
     load_custom_css()
+    
+    # Start loading models while the rest of the page bootstraps, but only
+    # after the system check passes so it still gates model and metadata loading
+    if 'search_engine' not in st.session_state:
+        system_check = perform_system_check()
+        st.session_state._system_check = system_check
+        if system_check['ready']:
+            start_search_engine_preload(config)
+
+
+def _preload_search_engine(config):
+    """
+    Build the search engine off the script thread.
+    
+    A tiny CUDA allocation comes first so the CUDA context initializes
+    alongside the CLIP import chain instead of on the first query.
+    
+    Args:
+        config: Application configuration
+        
+    Returns:
+        Initialized SearchEngine
+    """
+    if torch.cuda.is_available():
+        torch.empty(1, device='cuda')
+    return SearchEngine(config)
+
+
+def start_search_engine_preload(config):
+    """
+    Kick off search engine construction in a background thread for this session.
+    
+    The future is kept in session state and claimed by initialize_search_engine.
+    Callers start it only once perform_system_check has passed.
+    
+    Args:
+        config: Application configuration
+    """
+    if 'search_engine' in st.session_state or '_engine_future' in st.session_state:
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='engine-preload')
+    st.session_state._engine_future = executor.submit(_preload_search_engine, config)
+    # Let the worker exit once the engine is built
+    executor.shutdown(wait=False)
 
 
 def render_header():
@@ -72,32 +138,27 @@ def get_example_queries():
     ]
 
 
+def _example_query_markdown(heading, queries):
+    """Build one markdown block with a bold heading and a bullet list of queries."""
+    return f"**{heading}:**\n\n" + "\n".join(f"- {query}" for query in queries)
+
+
+# Example query columns are static, so their markdown is built once at import
+EXAMPLE_QUERY_COLUMNS = (
+    _example_query_markdown("Materials", ["red brick buildings", "glass and steel facades", "stone columns"]),
+    _example_query_markdown("Features", ["flat roof structures", "large windows", "curved architecture"]),
+    _example_query_markdown("Styles", ["modern office buildings", "traditional residential", "industrial architecture"]),
+)
+
+
 def render_example_queries():
     """Render example queries section."""
     st.markdown("### 💡 Example Queries")
     
-    example_queries = get_example_queries()
-    
-    # Group queries by category for better organization
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("**Materials:**")
-        materials = ["red brick buildings", "glass and steel facades", "stone columns"]
-        for query in materials:
-            st.markdown(f"• {query}")
-    
-    with col2:
-        st.markdown("**Features:**")
-        features = ["flat roof structures", "large windows", "curved architecture"]
-        for query in features:
-            st.markdown(f"• {query}")
-    
-    with col3:
-        st.markdown("**Styles:**")
-        styles = ["modern office buildings", "traditional residential", "industrial architecture"]
-        for query in styles:
-            st.markdown(f"• {query}")
+    # Group queries by category for better organization; one markdown call per column
+    for column, column_markdown in zip(st.columns(3), EXAMPLE_QUERY_COLUMNS):
+        with column:
+            st.markdown(column_markdown)
 
 
 def render_usage_instructions():
@@ -120,21 +181,32 @@ def initialize_search_engine():
     """Initialize and cache the search engine with enhanced error handling."""
     if 'search_engine' not in st.session_state:
         try:
-            config = get_config()
+            config = get_app_config()
             
             # Initialize performance optimizations
             cache = initialize_performance_optimizations()
             
             with st.spinner("Loading AI models and image database..."):
-                # Check system requirements first
-                system_check = perform_system_check()
+                # Check system requirements first, reusing this run's check
+                # from setup_page_config when there is one
+                system_check = st.session_state.pop('_system_check', None) or perform_system_check()
                 if not system_check['ready']:
                     error_msg = "System requirements not met:\n" + "\n".join([f"• {issue}" for issue in system_check['issues']])
                     render_error_message(error_msg, "System Check Failed")
                     st.stop()
                 
-                # Initialize search engine with retry logic
-                search_engine = initialize_with_retry(config, max_retries=3)
+                # Use the engine preloaded in the background, falling back to
+                # initialization with retry logic if the preload failed
+                search_engine = None
+                engine_future = st.session_state.pop('_engine_future', None)
+                if engine_future is not None:
+                    try:
+                        search_engine = engine_future.result()
+                    except Exception as e:
+                        logging.warning(f"Background search engine preload failed: {e}")
+                
+                if search_engine is None:
+                    search_engine = initialize_with_retry(config, max_retries=3)
                 
                 # Validate search readiness
                 status = search_engine.validate_search_readiness()
@@ -147,9 +219,15 @@ def initialize_search_engine():
                     render_recovery_suggestions()
                     st.stop()
                 
+                # Pay first-query initialization cost before the user searches
+                search_engine.warmup()
+                
+                # Serve the most common queries from the cache from the start
+                preload_common_queries(search_engine, cache)
+                
                 st.session_state.search_engine = search_engine
                 st.session_state.search_stats = status['statistics']
-                st.session_state.query_cache = cache
+                st.session_state.query_cache_obj = cache
                 st.session_state.initialization_time = time.time()
                 
         except Exception as e:
@@ -178,22 +256,23 @@ def perform_system_check():
     
     try:
         # Check available memory
-        memory = psutil.virtual_memory()
-        if memory.available < 2 * 1024 * 1024 * 1024:  # Less than 2GB
-            issues.append(f"Low memory: {memory.available / (1024**3):.1f}GB available (2GB+ recommended)")
+        memory = get_memory_snapshot()
+        memory_available = memory[0] if memory is not None else None
+        if memory_available is not None and memory_available < 2 * 1024 * 1024 * 1024:  # Less than 2GB
+            issues.append(f"Low memory: {memory_available / (1024**3):.1f}GB available (2GB+ recommended)")
         
         # Check disk space
-        disk = psutil.disk_usage('.')
-        if disk.free < 1 * 1024 * 1024 * 1024:  # Less than 1GB
-            issues.append(f"Low disk space: {disk.free / (1024**3):.1f}GB free (1GB+ recommended)")
+        disk_free = get_disk_snapshot('.')
+        if disk_free is not None and disk_free < 1 * 1024 * 1024 * 1024:  # Less than 1GB
+            issues.append(f"Low disk space: {disk_free / (1024**3):.1f}GB free (1GB+ recommended)")
         
         # Check if images directory exists
-        config = get_config()
-        if not Path(config.image_directory).exists():
+        config = get_app_config()
+        if not os.path.isdir(config.image_directory):
             issues.append(f"Images directory not found: {config.image_directory}")
         
         # Check if metadata file exists
-        if not Path(config.metadata_file).exists():
+        if not os.path.isfile(config.metadata_file):
             issues.append(f"Metadata file not found: {config.metadata_file}")
         
         # Check PyTorch availability
@@ -213,6 +292,14 @@ def initialize_with_retry(config, max_retries=3):
     """Initialize search engine with retry logic."""
     last_error = None
     
+    # Prime the CUDA caching allocator once so model loading is served from
+    # the pool instead of going back to the driver for each allocation
+    if torch.cuda.is_available():
+        try:
+            torch.empty(256 << 20, dtype=torch.uint8, device='cuda')
+        except Exception as e:
+            logging.debug(f"CUDA allocator warmup skipped: {e}")
+    
     for attempt in range(max_retries):
         try:
             if attempt > 0:
@@ -226,8 +313,9 @@ def initialize_with_retry(config, max_retries=3):
             last_error = e
             logging.warning(f"Initialization attempt {attempt + 1} failed: {e}")
             
-            # Clear any partial state
-            if torch.cuda.is_available():
+            # Only hand cached blocks back to the driver when memory ran out;
+            # other failures keep the warmed-up pool for the next attempt
+            if torch.cuda.is_available() and 'out of memory' in str(e).lower():
                 torch.cuda.empty_cache()
     
     # All retries failed
@@ -2,20 +2,54 @@
 Caching and performance optimization for the Streamlit web interface.
 """
 import streamlit as st
-import hashlib
+import os
 import time
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import numpy as np
+from PIL import Image, ImageOps
 
 from src.models.search_models import SearchResult, Query
 
+try:
+    import psutil
+except ImportError:
+    # Optional dependency; system resource metrics are skipped without it
+    psutil = None
+
+
+@lru_cache(maxsize=512)
+def _cache_key(query_text: str, max_results: int, similarity_threshold: float) -> Tuple[str, int, float]:
+    """
+    Build the query cache key, memoized since one rerun derives the same key repeatedly.
+    
+    The normalized parameters are used directly as the key; hashing a short
+    tuple is cheaper than deriving a digest, and the key never leaves the process.
+    
+    Args:
+        query_text: Search query text
+        max_results: Maximum results requested
+        similarity_threshold: Similarity threshold used
+        
+    Returns:
+        Unique cache key tuple
+    """
+    # Normalize query text
+    normalized_query = query_text.lower().strip()
+    
+    return (normalized_query, max_results, round(similarity_threshold, 3))
+
 
 class QueryCache:
     """
     Cache for search queries and results to improve response times.
     """
     
+    logger = logging.getLogger(__name__)
+    
     def __init__(self, max_size: int = 100, ttl_minutes: int = 30):
         """
         Initialize query cache.
@@ -25,12 +59,13 @@ class QueryCache:
             ttl_minutes: Time-to-live for cached results in minutes
         """
         self.max_size = max_size
-        self.ttl = timedelta(minutes=ttl_minutes)
-        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_minutes * 60.0
         
-        # Initialize cache in session state if not exists
-        if 'query_cache' not in st.session_state:
-            st.session_state.query_cache = {}
+        # Initialize cache in session state if not exists; entries are kept in
+        # least-recently-used order so eviction pops from the front
+        query_cache = st.session_state.get('query_cache')
+        if not isinstance(query_cache, OrderedDict):
+            st.session_state.query_cache = OrderedDict(query_cache) if isinstance(query_cache, dict) else OrderedDict()
         
         if 'cache_stats' not in st.session_state:
             st.session_state.cache_stats = {
@@ -39,7 +74,8 @@ class QueryCache:
                 'total_queries': 0
             }
     
-    def _generate_cache_key(self, query_text: str, max_results: int, similarity_threshold: float) -> str:
+    def _generate_cache_key(self, query_text: str, max_results: int,
+                            similarity_threshold: float) -> Tuple[str, int, float]:
         """
         Generate a unique cache key for a query.
         
@@ -49,16 +85,9 @@ class QueryCache:
             similarity_threshold: Similarity threshold used
             
         Returns:
-            Unique cache key string
+            Unique cache key tuple
         """
-        # Normalize query text
-        normalized_query = query_text.lower().strip()
-        
-        # Create cache key from query parameters
-        cache_input = f"{normalized_query}|{max_results}|{similarity_threshold:.3f}"
-        
-        # Generate hash for consistent key
-        return hashlib.md5(cache_input.encode()).hexdigest()
+        return _cache_key(query_text, max_results, similarity_threshold)
     
     def get(self, query_text: str, max_results: int = 5, similarity_threshold: float = 0.1) -> Optional[Tuple[List[SearchResult], dict]]:
         """
@@ -74,26 +103,30 @@ class QueryCache:
         """
         cache_key = self._generate_cache_key(query_text, max_results, similarity_threshold)
         
+        # Resolve session state once; the proxy dispatches on every attribute access
+        stats = st.session_state.cache_stats
+        query_cache = st.session_state.query_cache
+        
         # Update total queries count
-        st.session_state.cache_stats['total_queries'] += 1
+        stats['total_queries'] += 1
         
         # Check if key exists in cache
-        if cache_key not in st.session_state.query_cache:
-            st.session_state.cache_stats['misses'] += 1
+        cached_entry = query_cache.get(cache_key)
+        if cached_entry is None:
+            stats['misses'] += 1
             return None
         
-        cached_entry = st.session_state.query_cache[cache_key]
-        
         # Check if cache entry is still valid (not expired)
-        if datetime.now() - cached_entry['timestamp'] > self.ttl:
+        if time.monotonic() - cached_entry['timestamp'] > self.ttl_seconds:
             # Remove expired entry
-            del st.session_state.query_cache[cache_key]
-            st.session_state.cache_stats['misses'] += 1
+            del query_cache[cache_key]
+            stats['misses'] += 1
             self.logger.debug(f"Cache entry expired for query: {query_text[:30]}...")
             return None
         
         # Cache hit
-        st.session_state.cache_stats['hits'] += 1
+        query_cache.move_to_end(cache_key)
+        stats['hits'] += 1
         self.logger.debug(f"Cache hit for query: {query_text[:30]}...")
         
         return cached_entry['results'], cached_entry['stats']
@@ -112,35 +145,29 @@ class QueryCache:
         """
         cache_key = self._generate_cache_key(query_text, max_results, similarity_threshold)
         
-        # Check cache size and evict oldest entries if needed
-        self._evict_if_needed()
+        query_cache = st.session_state.query_cache
+        
+        # Check cache size and evict least recently used entries if needed
+        if cache_key not in query_cache:
+            self._evict_if_needed()
         
-        # Store in cache
-        st.session_state.query_cache[cache_key] = {
+        # Store in cache as the most recently used entry
+        query_cache[cache_key] = {
             'results': results,
             'stats': stats,
-            'timestamp': datetime.now(),
+            'timestamp': time.monotonic(),
             'query_text': query_text
         }
+        query_cache.move_to_end(cache_key)
         
         self.logger.debug(f"Cached results for query: {query_text[:30]}...")
     
     def _evict_if_needed(self):
-        """Evict oldest cache entries if cache is full."""
-        if len(st.session_state.query_cache) >= self.max_size:
-            # Find oldest entry
-            oldest_key = None
-            oldest_time = datetime.now()
-            
-            for key, entry in st.session_state.query_cache.items():
-                if entry['timestamp'] < oldest_time:
-                    oldest_time = entry['timestamp']
-                    oldest_key = key
-            
-            # Remove oldest entry
-            if oldest_key:
-                del st.session_state.query_cache[oldest_key]
-                self.logger.debug("Evicted oldest cache entry")
+        """Evict least recently used cache entries if cache is full."""
+        query_cache = st.session_state.query_cache
+        while query_cache and len(query_cache) >= self.max_size:
+            query_cache.popitem(last=False)
+            self.logger.debug("Evicted least recently used cache entry")
     
     def clear(self):
         """Clear all cached entries."""
@@ -172,37 +199,91 @@ class QueryCache:
         return stats
 
 
+def _load_thumbnail(path: str, size: Tuple[int, int]) -> Optional[np.ndarray]:
+    """
+    Decode one image into a size-padded RGB thumbnail.
+    
+    Args:
+        path: Image file path
+        size: Thumbnail (width, height)
+        
+    Returns:
+        (height, width, 3) uint8 array, or None if the image cannot be read
+    """
+    try:
+        with Image.open(path) as img:
+            # Let the JPEG decoder downscale while decoding instead of afterwards
+            img.draft('RGB', size)
+            thumbnail = ImageOps.pad(img.convert('RGB'), size,
+                                     method=Image.Resampling.BILINEAR, color=(255, 255, 255))
+        return np.asarray(thumbnail, dtype=np.uint8)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Failed to load thumbnail for {path}: {e}")
+        return None
+
+
 @st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_image_thumbnails(image_paths: List[str]) -> Dict[str, Any]:
+def load_image_thumbnails(image_paths: List[str],
+                          size: Tuple[int, int] = (256, 256)) -> Tuple[List[str], np.ndarray]:
     """
     Load and cache image thumbnails for faster display.
     
+    Thumbnails are stored in one contiguous (N, height, width, 3) uint8 array,
+    so a result grid can be drawn from a single buffer. Images are decoded on
+    a thread pool since PIL releases the GIL while decoding and resizing.
+    
     Args:
         image_paths: List of image file paths
+        size: Thumbnail (width, height); images are scaled to fit and padded
         
     Returns:
-        Dictionary mapping paths to thumbnail data
+        Tuple of (paths that loaded, thumbnail array with one row per path)
     """
-    thumbnails = {}
+    width, height = size
     
-    for path in image_paths:
-        try:
-            # For now, just store the path - actual thumbnail generation
-            # would require PIL/Pillow image processing
-            thumbnails[path] = {
-                'path': path,
-                'loaded': True,
-                'timestamp': datetime.now()
-            }
-        except Exception as e:
-            logging.getLogger(__name__).warning(f"Failed to load thumbnail for {path}: {e}")
-            thumbnails[path] = {
-                'path': path,
-                'loaded': False,
-                'error': str(e)
-            }
+    if not image_paths:
+        return [], np.empty((0, height, width, 3), dtype=np.uint8)
+    
+    max_workers = min(len(image_paths), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        decoded = list(executor.map(lambda path: _load_thumbnail(path, size), image_paths))
+    
+    loaded_paths = [path for path, thumbnail in zip(image_paths, decoded) if thumbnail is not None]
+    thumbnails = np.empty((len(loaded_paths), height, width, 3), dtype=np.uint8)
+    for row, thumbnail in enumerate(t for t in decoded if t is not None):
+        thumbnails[row] = thumbnail
     
-    return thumbnails
+    return loaded_paths, thumbnails
+
+
+@st.cache_data(ttl=5)
+def get_memory_snapshot() -> Optional[Tuple[int, float]]:
+    """
+    Read system memory usage, cached briefly since every rerun asks for it.
+    
+    Returns:
+        Tuple of (available bytes, percent used), or None if psutil is unavailable
+    """
+    if psutil is None:
+        return None
+    memory = psutil.virtual_memory()
+    return memory.available, memory.percent
+
+
+@st.cache_data(ttl=5)
+def get_disk_snapshot(path: str = '.') -> Optional[int]:
+    """
+    Read free disk space, cached briefly since every rerun asks for it.
+    
+    Args:
+        path: Path on the filesystem to check
+        
+    Returns:
+        Free bytes, or None if psutil is unavailable
+    """
+    if psutil is None:
+        return None
+    return psutil.disk_usage(path).free
 
 
 @st.cache_resource
@@ -244,8 +325,8 @@ def optimize_session_state():
 def render_performance_metrics():
     """Render enhanced performance metrics in the sidebar."""
     try:
-        if 'cache_stats' in st.session_state:
-            cache = QueryCache()
+        cache = st.session_state.get('query_cache_obj')
+        if cache is not None and 'cache_stats' in st.session_state:
             stats = cache.get_stats()
             
             st.sidebar.markdown("### ⚡ Performance")
@@ -279,16 +360,15 @@ def render_performance_metrics():
             
             # Memory usage (if available)
             try:
-                import psutil
-                memory = psutil.virtual_memory()
-                st.sidebar.markdown("**System Resources:**")
-                st.sidebar.write(f"Memory Usage: {memory.percent:.1f}%")
-                
-                if memory.percent > 85:
-                    st.sidebar.warning("⚠️ High memory usage")
+                memory = get_memory_snapshot()
+                if memory is not None:
+                    _, memory_percent = memory
+                    st.sidebar.markdown("**System Resources:**")
+                    st.sidebar.write(f"Memory Usage: {memory_percent:.1f}%")
+                    
+                    if memory_percent > 85:
+                        st.sidebar.warning("⚠️ High memory usage")
                 
-            except ImportError:
-                pass  # psutil not available
             except Exception as e:
                 st.sidebar.error(f"System info unavailable: {e}")
         
@@ -300,10 +380,24 @@ def render_performance_metrics():
         st.sidebar.error(f"Error displaying performance metrics: {e}")
 
 
-def preload_common_queries():
+def preload_common_queries(search_engine=None, cache: Optional[QueryCache] = None,
+                           max_results: int = 5, similarity_threshold: float = 0.1) -> int:
     """
     Preload results for common queries to improve initial response times.
+    
+    Queries run one after another on the calling thread: SearchEngine keeps
+    unsynchronized caches and statistics, so it must not be shared across threads.
+    
+    Args:
+        search_engine: SearchEngine used to run the queries (nothing is preloaded if None)
+        cache: QueryCache to populate (a new one is created if None)
+        max_results: Maximum results per query
+        similarity_threshold: Similarity threshold per query
+        
+    Returns:
+        Number of queries preloaded into the cache
     """
+    logger = logging.getLogger(__name__)
     common_queries = [
         "red brick buildings",
         "glass facades", 
@@ -312,9 +406,45 @@ def preload_common_queries():
         "flat roofs"
     ]
     
-    # This would be implemented to pre-populate cache with common searches
-    # For now, just log the intent
-    logging.getLogger(__name__).info(f"Would preload {len(common_queries)} common queries")
+    if search_engine is None:
+        logger.info(f"No search engine provided, skipping preload of {len(common_queries)} common queries")
+        return 0
+    
+    if cache is None:
+        cache = QueryCache()
+    
+    preloaded = 0
+    for query_text in common_queries:
+        start_time = time.perf_counter_ns()
+        try:
+            results, _ = search_engine.search(
+                query_text=query_text,
+                max_results=max_results,
+                similarity_threshold=similarity_threshold,
+                ranking_strategy='confidence'
+            )
+        except Exception as e:
+            logger.warning(f"Failed to preload query '{query_text}': {e}")
+            continue
+        
+        stats = {
+            'results_count': len(results),
+            'search_time': (time.perf_counter_ns() - start_time) * 1e-9,
+            'avg_confidence': sum(r.confidence_score for r in results) / len(results) if results else 0,
+            'query_text': query_text,
+            'cached': False,
+            'cache_hit': False,
+            'filtered_results': 0
+        }
+        cache.put(query_text, results, stats, max_results, similarity_threshold)
+        preloaded += 1
+    
+    logger.info(f"Preloaded {preloaded}/{len(common_queries)} common queries")
+    return preloaded
+
+
+# Light grey "Loading..." SVG shown in place of images that are not loaded yet
+_PLACEHOLDER_IMAGE_URL = "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZGRkIi8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCwgc2Fucy1zZXJpZiIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5OSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkxvYWRpbmcuLi48L3RleHQ+PC9zdmc+"
 
 
 class LazyImageLoader:
@@ -352,8 +482,7 @@ class LazyImageLoader:
         Returns:
             Path or data URL for placeholder image
         """
-        # Return a simple placeholder - in production this could be a base64 encoded image
-        return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMzAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZGRkIi8+PHRleHQgeD0iNTAlIiB5PSI1MCUiIGZvbnQtZmFtaWx5PSJBcmlhbCwgc2Fucy1zZXJpZiIgZm9udC1zaXplPSIxNCIgZmlsbD0iIzk5OSIgdGV4dC1hbmNob3I9Im1pZGRsZSIgZHk9Ii4zZW0iPkxvYWRpbmcuLi48L3RleHQ+PC9zdmc+"
+        return _PLACEHOLDER_IMAGE_URL
 
 
 def initialize_performance_optimizations():
@@ -363,8 +492,11 @@ def initialize_performance_optimizations():
     # Clean up session state
     optimize_session_state()
     
-    # Initialize cache
-    cache = QueryCache()
+    # Initialize cache once per session and keep it for later reruns
+    cache = st.session_state.get('query_cache_obj')
+    if cache is None:
+        cache = QueryCache()
+        st.session_state.query_cache_obj = cache
     
     # Initialize lazy loader
     if 'lazy_loader' not in st.session_state:
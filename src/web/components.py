@@ -3,7 +3,7 @@ Reusable UI components for the Streamlit web interface.
 """
 import streamlit as st
 from typing import List, Optional
-from pathlib import Path
+import os
 
 from src.models.search_models import SearchResult
 from .styles import get_confidence_class, format_confidence_score
@@ -89,10 +89,14 @@ def render_result_card(result: SearchResult, index: int):
         result: SearchResult object to display
         index: Index of the result for unique keys
     """
+    # Format the relevance score once for the caption and badge
+    conf_str = format_confidence_score(result.confidence_score)
+    confidence_class = get_confidence_class(result.confidence_score)
+    
     # Check if image file exists
-    image_path = Path(result.image_path)
+    image_path = result.image_path
     
-    if not image_path.exists():
+    if not os.path.exists(image_path):
         st.error(f"Image not found: {result.image_path}")
         return
     
@@ -101,8 +105,8 @@ def render_result_card(result: SearchResult, index: int):
         # Display image
         try:
             st.image(
-                str(image_path), 
-                caption=f"Relevance: {format_confidence_score(result.confidence_score)}",
+                image_path, 
+                caption=f"Relevance: {conf_str}",
                 use_column_width=True
             )
         except Exception as e:
@@ -110,10 +114,9 @@ def render_result_card(result: SearchResult, index: int):
             return
         
         # Relevance score badge with color-coded indicator
-        confidence_class = get_confidence_class(result.confidence_score)
         st.markdown(f"""
         <div class="{confidence_class}">
-            Match Strength: {format_confidence_score(result.confidence_score)}
+            Match Strength: {conf_str}
         </div>
         """, unsafe_allow_html=True)
         
@@ -131,7 +134,7 @@ def render_result_card(result: SearchResult, index: int):
         
         # Additional details in expander
         with st.expander("Details", expanded=False):
-            st.write(f"**File:** {image_path.name}")
+            st.write(f"**File:** {os.path.basename(image_path)}")
             st.write(f"**Similarity Score:** {result.similarity_score:.3f}")
             if len(result.features) > 5:
                 st.write(f"**All Features:** {', '.join(result.features)}")
@@ -3,8 +3,10 @@ Results display functionality for the Streamlit web interface.
 """
 import streamlit as st
 from typing import List, Optional
-from pathlib import Path
 import os
+import io
+import base64
+from PIL import Image
 
 from src.models.search_models import SearchResult
 from .components import (
@@ -14,140 +16,276 @@ from .components import (
 )
 from .styles import get_confidence_class, format_confidence_score
 
+# Scope reruns to the results section where Streamlit supports fragments
+# (st.fragment in 1.37+, st.experimental_fragment in 1.33-1.36); older
+# versions fall back to a plain function and rerun the whole script.
+_fragment = (
+    getattr(st, 'fragment', None)
+    or getattr(st, 'experimental_fragment', None)
+    or (lambda func: func)
+)
+
+# Translation table for escaping text interpolated into card HTML
+_HTML_ESCAPE = str.maketrans({'<': '&lt;', '>': '&gt;', '&': '&amp;'})
+
+# Inline card images are downscaled JPEGs, which caps each data URI at a few dozen KB
+_INLINE_IMAGE_MAX_SIZE = (640, 640)
+_INLINE_IMAGE_QUALITY = 80
 
+# Placeholder shown in place of missing or unreadable images
+_PLACEHOLDER_TMPL = """
+    <div style="
+        background: #f8f9fa; 
+        border: 2px dashed #dee2e6; 
+        border-radius: 8px; 
+        padding: 2rem; 
+        text-align: center; 
+        margin: 1rem 0;
+        min-height: 200px;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+        align-items: center;
+    ">
+        <div style="font-size: 3rem; color: #6c757d; margin-bottom: 1rem;">🖼️</div>
+        <h4 style="color: #6c757d; margin-bottom: 0.5rem;">Image Unavailable</h4>
+        <p style="color: #6c757d; margin-bottom: 0.5rem; font-size: 0.9rem;">{err}</p>
+        <p style="color: #adb5bd; font-size: 0.8rem; font-family: monospace;">{name}</p>
+    </div>
+    """
+
+
+@st.cache_data(ttl=60, show_spinner=False)
 def check_image_exists(image_path: str) -> bool:
     """
     Check if image file exists and is accessible.
     
+    Results are cached for a minute so reruns don't stat every card again.
+    
     Args:
         image_path: Path to the image file
         
     Returns:
-        True if image exists and is readable
+        True if image exists and is a regular file
     """
-    try:
-        path = Path(image_path)
-        return path.exists() and path.is_file()
-    except Exception:
-        return False
+    return os.path.isfile(image_path)
 
 
-def render_result_card(result: SearchResult, index: int, column_width: str = "100%"):
+@st.cache_data(max_entries=256, show_spinner=False)
+def _load_image_data_uri(path: str, mtime: float) -> str:
     """
-    Render a single search result card with enhanced error handling and graceful degradation.
+    Load an image as a size-capped JPEG data URI, memoized across reruns.
     
     Args:
-        result: SearchResult object to display
-        index: Index of the result for unique keys
-        column_width: CSS width for the card
+        path: Path to the image file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        Data URI suitable for an <img> src attribute
+        
+    Raises:
+        OSError: If the image cannot be read or decoded
     """
-    # Create card container with custom styling
-    st.markdown(f"""
-    <div class="result-card" style="width: {column_width}; margin-bottom: 1.5rem;">
-    """, unsafe_allow_html=True)
+    with Image.open(path) as img:
+        # Let the JPEG decoder downscale while decoding instead of afterwards
+        img.draft('RGB', _INLINE_IMAGE_MAX_SIZE)
+        thumbnail = img.convert('RGB')
+    thumbnail.thumbnail(_INLINE_IMAGE_MAX_SIZE)
+    
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format='JPEG', quality=_INLINE_IMAGE_QUALITY, optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def _card_key(result: SearchResult) -> tuple:
+    """
+    Build a hashable cache key from the fields a result card displays.
     
-    try:
-        # Check if image exists and handle gracefully
-        image_exists = check_image_exists(result.image_path)
+    Args:
+        result: SearchResult object to key
         
-        if image_exists:
-            try:
-                # Display image with caption
-                st.image(
-                    result.image_path,
-                    caption=f"Relevance: {format_confidence_score(result.confidence_score)}",
-                    use_column_width=True
-                )
-            except Exception as e:
-                # Fallback: show placeholder with error info
-                render_image_placeholder(result.image_path, str(e))
-        else:
-            # Show placeholder for missing image
-            render_image_placeholder(result.image_path, "Image file not found")
+    Returns:
+        Tuple of image path, confidence score and features
+    """
+    return (result.image_path, result.confidence_score, tuple(result.features))
+
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def _precompute_card(result_key: tuple) -> dict:
+    """
+    Precompute the formatted strings a result card needs.
+    
+    Args:
+        result_key: Key produced by _card_key
         
-        # Relevance score badge (always show)
-        confidence_class = get_confidence_class(result.confidence_score)
-        st.markdown(f"""
-        <div class="{confidence_class}" style="margin: 0.5rem 0;">
-            Relevance: {format_confidence_score(result.confidence_score)}
-        </div>
-        """, unsafe_allow_html=True)
+    Returns:
+        Dictionary with conf_str, conf_class, file_name, sanitized_features_html
+        and more_features_html
+    """
+    image_path, confidence_score, features = result_key
+    
+    # Sanitize and tag at most 6 features
+    feature_html = "".join(
+        f'<span class="feature-tag">{str(feature).translate(_HTML_ESCAPE)}</span> '
+        for feature in features[:6]
+    )
+    
+    # Remaining features sit behind a collapsed "+N more" toggle
+    more_features_html = ""
+    if len(features) > 6:
+        more_tags = "".join(
+            f'<span class="feature-tag">{str(feature).translate(_HTML_ESCAPE)}</span> '
+            for feature in features[6:]
+        )
+        more_features_html = (
+            f'<details class="result-details"><summary>+{len(features) - 6} more features</summary>'
+            f'<div>{more_tags}</div></details>'
+        )
+    
+    return {
+        'conf_str': format_confidence_score(confidence_score),
+        'conf_class': get_confidence_class(confidence_score),
+        'file_name': os.path.basename(image_path),
+        'sanitized_features_html': feature_html,
+        'more_features_html': more_features_html
+    }
+
+
+def precompute_cards(results: List[SearchResult]) -> List[dict]:
+    """
+    Precompute card strings for a list of results.
+    
+    Args:
+        results: List of SearchResult objects
         
-        # Description (with fallback)
-        description = result.description if result.description else "No description available"
-        st.markdown(f"**Description:**")
-        st.markdown(f"*{description}*")
+    Returns:
+        List of precomputed card dictionaries, aligned with results
+    """
+    return [_precompute_card(_card_key(result)) for result in results]
+
+
+def build_result_card_html(result: SearchResult, column_width: str = "100%",
+                           card: Optional[dict] = None, layout: str = 'grid') -> str:
+    """
+    Build the HTML for a single search result card with graceful degradation for missing images.
+    
+    Args:
+        result: SearchResult object to display
+        column_width: CSS width for the card
+        card: Precomputed card strings from precompute_cards (computed if None)
+        layout: 'grid' or 'list'; list cards carry their own bottom separator
         
-        # Features as tags (with error handling)
-        if hasattr(result, 'features') and result.features and len(result.features) > 0:
-            st.markdown("**Features:**")
-            
-            try:
-                # Limit features displayed and create tags
-                display_features = result.features[:6]  # Show max 6 features
-                
-                feature_html = ""
-                for feature in display_features:
-                    # Sanitize feature text
-                    clean_feature = str(feature).replace('<', '&lt;').replace('>', '&gt;')
-                    feature_html += f'<span class="feature-tag">{clean_feature}</span> '
-                
-                st.markdown(feature_html, unsafe_allow_html=True)
-                
-                # Show remaining features count if there are more
-                if len(result.features) > 6:
-                    st.markdown(f"*+{len(result.features) - 6} more features*")
-                    
-            except Exception as e:
-                st.markdown(f"*Features unavailable: {e}*")
+    Returns:
+        Card HTML string
+    """
+    if card is None:
+        card = _precompute_card(_card_key(result))
+    conf_str = card['conf_str']
+    features = result.features
+    
+    # Check if image exists and handle gracefully
+    image_exists = check_image_exists(result.image_path)
+    
+    # Card body is accumulated and joined into a single HTML string
+    separator = " border-bottom: 1px solid #eee;" if layout == 'list' else ""
+    parts = [f'<div class="result-card" style="width: {column_width}; margin-bottom: 1.5rem;{separator}">']
+    
+    if image_exists:
+        try:
+            # Display image with caption
+            image_src = _load_image_data_uri(result.image_path, os.path.getmtime(result.image_path))
+            parts.append(
+                f'<img src="{image_src}" loading="lazy" decoding="async" style="width:100%">'
+                f'<div style="text-align: center; color: #6c757d; font-size: 0.9rem;">'
+                f'Relevance: {conf_str}</div>'
+            )
+        except OSError as e:
+            # Fallback: show placeholder with error info
+            parts.append(_image_placeholder_html(result.image_path, str(e)))
+    else:
+        # Show placeholder for missing image
+        parts.append(_image_placeholder_html(result.image_path, "Image file not found"))
+    
+    # Relevance score badge (always show)
+    parts.append(
+        f'<div class="{card["conf_class"]}" style="margin: 0.5rem 0;">'
+        f'Relevance: {conf_str}</div>'
+    )
+    
+    # Description (with fallback)
+    description = result.description if result.description else "No description available"
+    parts.append(f'<p><strong>Description:</strong><br><em>{description.translate(_HTML_ESCAPE)}</em></p>')
+    
+    # Features as tags
+    if features:
+        parts.append('<p><strong>Features:</strong></p>')
+        parts.append(f'<div>{card["sanitized_features_html"]}</div>')
         
-        # Additional details in expander (with error handling)
-        with st.expander("🔍 View Details", expanded=False):
-            try:
-                # Validate similarity score
-                sim_score = getattr(result, 'similarity_score', 0.0)
-                if isinstance(sim_score, (int, float)) and -1 <= sim_score <= 1:
-                    st.write(f"**Similarity Score:** {sim_score:.3f}")
-                else:
-                    st.write(f"**Similarity Score:** N/A")
-                
-                # Relevance score
-                st.write(f"**Relevance Score:** {format_confidence_score(result.confidence_score)}")
-                
-                # File name (with error handling)
-                try:
-                    file_name = Path(result.image_path).name
-                    st.write(f"**File:** `{file_name}`")
-                except Exception:
-                    st.write(f"**File:** `{result.image_path}`")
-                
-                st.write(f"**Path:** `{result.image_path}`")
-                
-                # Image status
-                if image_exists:
-                    st.success("✅ Image accessible")
-                else:
-                    st.error("❌ Image missing")
-                
-                # All features (if available)
-                if hasattr(result, 'features') and result.features and len(result.features) > 6:
-                    st.markdown("**All Features:**")
-                    try:
-                        st.write(", ".join(str(f) for f in result.features))
-                    except Exception as e:
-                        st.write(f"Error displaying features: {e}")
-                        
-            except Exception as e:
-                st.error(f"Error in details section: {e}")
-    
-    except Exception as e:
-        # Fallback error display
-        st.error(f"Error rendering result card: {e}")
-        st.write(f"**Image Path:** {getattr(result, 'image_path', 'Unknown')}")
-        st.write(f"**Confidence:** {getattr(result, 'confidence_score', 'Unknown')}")
+        # Remaining features are only shown when the toggle is opened
+        parts.append(card["more_features_html"])
+    
+    # Additional details as a native collapsible block
+    # SearchResult validates the score type; only the range needs checking
+    sim_score = result.similarity_score
+    sim_str = f"{sim_score:.3f}" if -1 <= sim_score <= 1 else "N/A"
+    
+    # Image status
+    if image_exists:
+        status_html = '<span class="status-ok">✅ Image accessible</span>'
+    else:
+        status_html = '<span class="status-missing">❌ Image missing</span>'
+    
+    details = [
+        '<details class="result-details"><summary>🔍 View Details</summary>',
+        '<div class="details-grid">',
+        f'<strong>Similarity Score:</strong> {sim_str}<br>',
+        f'<strong>Relevance Score:</strong> {conf_str}<br>',
+        f'<strong>File:</strong> <code>{card["file_name"].translate(_HTML_ESCAPE)}</code><br>',
+        f'<strong>Path:</strong> <code>{str(result.image_path).translate(_HTML_ESCAPE)}</code><br>',
+        status_html,
+        '</div></details>'
+    ]
+    parts.append("".join(details))
     
     # Close card container
-    st.markdown("</div>", unsafe_allow_html=True)
+    parts.append('</div>')
+    return "".join(parts)
+
+
+def render_result_card(result: SearchResult, index: int, column_width: str = "100%",
+                       card: Optional[dict] = None, layout: str = 'grid'):
+    """
+    Render a single search result card in one markdown call.
+    
+    The image is inlined as a downscaled JPEG data URI, so a card is one
+    Streamlit element instead of an st.image plus a markdown block.
+    
+    Args:
+        result: SearchResult object to display
+        index: Index of the result for unique keys
+        column_width: CSS width for the card
+        card: Precomputed card strings from precompute_cards (computed if None)
+        layout: 'grid' or 'list'; list cards carry their own bottom separator
+    """
+    st.markdown(build_result_card_html(result, column_width, card, layout), unsafe_allow_html=True)
+
+
+def _image_placeholder_html(image_path: str, error_message: str) -> str:
+    """
+    Build the placeholder HTML for missing or broken images.
+    
+    Args:
+        image_path: Path to the missing image
+        error_message: Error message to display
+        
+    Returns:
+        Placeholder HTML string
+    """
+    return _PLACEHOLDER_TMPL.format(
+        err=str(error_message).translate(_HTML_ESCAPE),
+        name=os.path.basename(image_path).translate(_HTML_ESCAPE)
+    )
 
 
 def render_image_placeholder(image_path: str, error_message: str):
@@ -158,75 +296,104 @@ def render_image_placeholder(image_path: str, error_message: str):
         image_path: Path to the missing image
         error_message: Error message to display
     """
-    st.markdown(f"""
-    <div style="
-        background: #f8f9fa; 
-        border: 2px dashed #dee2e6; 
-        border-radius: 8px; 
-        padding: 2rem; 
-        text-align: center; 
-        margin: 1rem 0;
-        min-height: 200px;
-        display: flex;
-        flex-direction: column;
-        justify-content: center;
-        align-items: center;
-    ">
-        <div style="font-size: 3rem; color: #6c757d; margin-bottom: 1rem;">🖼️</div>
-        <h4 style="color: #6c757d; margin-bottom: 0.5rem;">Image Unavailable</h4>
-        <p style="color: #6c757d; margin-bottom: 0.5rem; font-size: 0.9rem;">{error_message}</p>
-        <p style="color: #adb5bd; font-size: 0.8rem; font-family: monospace;">{Path(image_path).name}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_image_placeholder_html(image_path, error_message), unsafe_allow_html=True)
+
+
+def get_results_window(page_size: int) -> int:
+    """
+    Get the number of results currently revealed by "Load more".
+    
+    Args:
+        page_size: Number of results added per page
+        
+    Returns:
+        Number of results to render
+    """
+    return st.session_state.setdefault('results_window', page_size)
 
 
-def render_results_grid(results: List[SearchResult], columns: int = 3):
+def render_load_more_button(window: int, total: int, page_size: int):
+    """
+    Render a "Load more" button that reveals the next page of results.
+    
+    Args:
+        window: Number of results currently rendered
+        total: Total number of results available
+        page_size: Number of results to add per click
+    """
+    if window >= total:
+        return
+    
+    st.button(
+        f"Load more ({total - window} remaining)",
+        key="load_more_results",
+        on_click=lambda: st.session_state.__setitem__('results_window', window + page_size),
+        use_container_width=True
+    )
+
+
+def render_results_grid(results: List[SearchResult], columns: int = 3,
+                        cards: Optional[List[dict]] = None):
     """
     Render search results in a responsive grid layout.
     
+    Only the revealed window of results is rendered; the rest are added a page
+    at a time so the initial render cost stays proportional to one page. The
+    window is emitted as a single CSS grid rather than rows of st.columns.
+    
     Args:
         results: List of SearchResult objects to display
         columns: Number of columns in the grid (1-4)
+        cards: Precomputed card strings aligned with results
     """
     if not results:
         return
     
+    if cards is None:
+        cards = precompute_cards(results)
+    
     # Ensure columns is within reasonable range
     columns = max(1, min(columns, 4))
     
-    # Calculate number of rows needed
-    num_results = len(results)
-    rows = (num_results + columns - 1) // columns
-    
-    for row in range(rows):
-        # Create columns for this row
-        cols = st.columns(columns)
-        
-        for col_idx in range(columns):
-            result_idx = row * columns + col_idx
-            
-            # Check if we have a result for this position
-            if result_idx < num_results:
-                with cols[col_idx]:
-                    render_result_card(results[result_idx], result_idx)
+    page_size = columns * 2
+    window = get_results_window(page_size)
+    visible_results = results[:window]
+    
+    # The whole visible grid is emitted as one CSS-grid block
+    cards_html = "".join(
+        build_result_card_html(result, card=card)
+        for result, card in zip(visible_results, cards)
+    )
+    st.markdown(
+        f'<div class="results-grid cols-{columns}" style="gap: 1rem; margin-top: 0;">{cards_html}</div>',
+        unsafe_allow_html=True
+    )
+    
+    render_load_more_button(window, len(results), page_size)
 
 
-def render_results_list(results: List[SearchResult]):
+def render_results_list(results: List[SearchResult], cards: Optional[List[dict]] = None):
     """
     Render search results in a single-column list layout.
     
     Args:
         results: List of SearchResult objects to display
+        cards: Precomputed card strings aligned with results
     """
     if not results:
         return
     
-    for i, result in enumerate(results):
-        render_result_card(result, i, "100%")
-        
-        # Add separator between results (except for last one)
-        if i < len(results) - 1:
-            st.markdown("---")
+    if cards is None:
+        cards = precompute_cards(results)
+    
+    page_size = 5
+    window = get_results_window(page_size)
+    visible_results = results[:window]
+    
+    for i, result in enumerate(visible_results):
+        render_result_card(result, i, "100%", card=cards[i], layout='list')
+    
+    render_load_more_button(window, len(results), page_size)
 
 
 def render_results_header(results: List[SearchResult], query: str, stats: dict):
@@ -275,6 +442,9 @@ def render_results_controls(results: List[SearchResult]) -> dict:
     """
     Render controls for customizing results display.
     
+    The controls live in a collapsed expander and are keyed, so their values
+    persist in session state across reruns.
+    
     Args:
         results: List of search results
         
@@ -284,44 +454,46 @@ def render_results_controls(results: List[SearchResult]) -> dict:
     if not results:
         return {}
     
-    st.markdown("#### Display Options")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        # Layout selection
-        layout = st.selectbox(
-            "Layout",
-            options=["Grid", "List"],
-            index=0,
-            help="Choose how to display results"
-        )
-    
-    with col2:
-        # Grid columns (only show if grid layout selected)
-        if layout == "Grid":
-            columns = st.selectbox(
-                "Columns",
-                options=[1, 2, 3, 4],
-                index=2,  # Default to 3 columns
-                help="Number of columns in grid"
+    with st.expander("Display Options", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            # Layout selection
+            st.selectbox(
+                "Layout",
+                options=["Grid", "List"],
+                index=0,
+                key='layout_sel',
+                help="Choose how to display results"
             )
-        else:
-            columns = 1
-    
-    with col3:
-        # Results limit
-        max_display = st.selectbox(
-            "Show Results",
-            options=[5, 10, 15, 20, "All"],
-            index=0,
-            help="Maximum number of results to display"
-        )
+        
+        with col2:
+            # Grid columns (only show if grid layout selected)
+            if st.session_state.get('layout_sel', 'Grid') == "Grid":
+                st.selectbox(
+                    "Columns",
+                    options=[1, 2, 3, 4],
+                    index=2,  # Default to 3 columns
+                    key='cols_sel',
+                    help="Number of columns in grid"
+                )
+        
+        with col3:
+            # Results limit
+            st.selectbox(
+                "Show Results",
+                options=[5, 10, 15, 20, "All"],
+                index=0,
+                key='max_sel',
+                help="Maximum number of results to display"
+            )
+    
+    layout = st.session_state.get('layout_sel', 'Grid')
     
     return {
         'layout': layout,
-        'columns': columns,
-        'max_display': max_display
+        'columns': st.session_state.get('cols_sel', 3) if layout == "Grid" else 1,
+        'max_display': st.session_state.get('max_sel', 5)
     }
 
 
@@ -352,10 +524,14 @@ def render_about_scores_section():
         """)
 
 
+@_fragment
 def render_search_results(results: List[SearchResult], query: str, stats: dict):
     """
     Render complete search results section with controls and display.
     
+    Runs as a fragment when available, so interacting with the display
+    controls or "Load more" reruns only this section.
+    
     Args:
         results: List of SearchResult objects to display
         query: Search query text
@@ -388,10 +564,12 @@ def render_search_results(results: List[SearchResult], query: str, stats: dict):
     layout = controls.get('layout', 'Grid')
     columns = controls.get('columns', 3)
     
+    cards = precompute_cards(display_results)
+    
     if layout == "Grid":
-        render_results_grid(display_results, columns)
+        render_results_grid(display_results, columns, cards)
     else:
-        render_results_list(display_results)
+        render_results_list(display_results, cards)
     
     # Show additional info if results were limited
     if len(results) > len(display_results):
@@ -161,7 +161,7 @@ def perform_search(search_engine: SearchEngine, query_text: str,
         # Cache error shouldn't stop search
         logging.warning(f"Cache lookup failed: {e}")
     
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     
     try:
         # Validate search engine state
@@ -182,7 +182,7 @@ def perform_search(search_engine: SearchEngine, query_text: str,
             ranking_strategy='confidence'
         )
         
-        search_time = time.time() - start_time
+        search_time = (time.perf_counter_ns() - start_time) * 1e-9
         
         # Validate results
         if results is None:
@@ -220,7 +220,7 @@ def perform_search(search_engine: SearchEngine, query_text: str,
         return valid_results, query, stats
         
     except Exception as e:
-        search_time = time.time() - start_time
+        search_time = (time.perf_counter_ns() - start_time) * 1e-9
         
         # Log error with context
         context = {
@@ -324,6 +324,8 @@ def render_search_interface(search_engine: SearchEngine):
         st.session_state.search_results = results
         st.session_state.search_stats = stats
         st.session_state.last_query = stats.get('query_text', '')
+        # New results start again from the first page
+        st.session_state.pop('results_window', None)
     
     return results, stats
 
@@ -336,6 +338,8 @@ def clear_search_results():
         del st.session_state.search_stats
     if 'last_query' in st.session_state:
         del st.session_state.last_query
+    if 'results_window' in st.session_state:
+        del st.session_state.results_window
 
 
 def get_cached_search_results() -> Tuple[Optional[List[SearchResult]], Optional[dict], Optional[str]]:
@@ -42,6 +42,11 @@ def load_custom_css():
         margin-top: 2rem;
     }
     
+    .results-grid.cols-1 { grid-template-columns: repeat(1, minmax(0, 1fr)); }
+    .results-grid.cols-2 { grid-template-columns: repeat(2, minmax(0, 1fr)); }
+    .results-grid.cols-3 { grid-template-columns: repeat(3, minmax(0, 1fr)); }
+    .results-grid.cols-4 { grid-template-columns: repeat(4, minmax(0, 1fr)); }
+    
     /* Result card styling */
     .result-card {
         background: white;
@@ -150,6 +155,27 @@ def load_custom_css():
         font-size: 0.7rem;
     }
     
+    /* Collapsible result details */
+    .result-details summary {
+        cursor: pointer;
+        font-weight: 600;
+        padding: 0.5rem 0;
+    }
+    
+    .details-grid {
+        font-size: 0.85rem;
+        line-height: 1.6;
+        word-break: break-all;
+    }
+    
+    .details-grid .status-ok {
+        color: #155724;
+    }
+    
+    .details-grid .status-missing {
+        color: #721c24;
+    }
+    
     /* Example queries styling */
     .example-queries {
         background: #f8f9fa;
@@ -204,7 +230,10 @@ def load_custom_css():
             padding-right: 1rem;
         }
         
-        .results-grid {
+        .results-grid,
+        .results-grid.cols-2,
+        .results-grid.cols-3,
+        .results-grid.cols-4 {
             grid-template-columns: 1fr;
         }
         
@@ -319,14 +348,7 @@ def format_confidence_score(confidence_score: float) -> str:
     percentage = confidence_score * 100
     
     # Add match quality label based on score
-    if confidence_score >= 0.35:
-        quality = "Strong Match"
-    elif confidence_score >= 0.25:
-        quality = "Good Match"
-    else:
-        quality = "Weak Match"
-    
-    return f"{percentage:.1f}% ({quality})"
+    return f"{percentage:.1f}% ({get_match_quality_label(confidence_score)})"
 
 
 def get_match_quality_label(confidence_score: float) -> str: